@@ -2,8 +2,12 @@ import enum
 import pygame
 import random
 
+from camera import *
 from game import *
 from globals import *
+from pathfinding import *
+from pools import *
+from render import *
 from utils import *
 
 
@@ -16,7 +20,13 @@ class CharacterState(enum.Enum):
     BLOCKED = enum.auto()
 
 
+# Character states by value, for stores holding states as integers
+CHARACTER_STATES = {state.value: state for state in CharacterState}
+
+
 class TileCursor:
+    __slots__ = ("color", "thickness", "position", "tile_idx")
+
     def __init__(self) -> None:
         self.color = "green"
         self.thickness = 5
@@ -24,27 +34,52 @@ class TileCursor:
         self.tile_idx = pygame.Vector2()
 
     def animate(self) -> None:
-        self.tile_idx = tile_idx(self.position)
+        tile_idx_ip(self.position, self.tile_idx)
 
-    def render(self) -> None:
-        screen = pygame.display.get_surface()
+    def render(
+        self, camera: Camera, layer: RenderLayer = RenderLayer.OVERLAY
+    ) -> pygame.Rect:
         tile_width, tile_height = tile_size()
         target_tile_rect = pygame.Rect(0, 0, tile_width, tile_height)
-        target_tile_rect.topleft = tile_top_left(self.tile_idx)  # type: ignore
-        pygame.draw.rect(screen, self.color, target_tile_rect, self.thickness)
+        target_tile_rect.topleft = camera.to_screen(tile_top_left(self.tile_idx))  # type: ignore
+        return render_queue.submit_outline(
+            self.color, target_tile_rect, self.thickness, layer
+        )
 
 
 class Character:
+    # Slotted, as there are hundreds of characters and their attributes are read in
+    # every simulation step. Where characters are, how they are doing and what they
+    # collide with is left to subclasses, which either hold it themselves or are views
+    # onto a store moving many characters at once.
+    __slots__ = (
+        "game",
+        "surface",
+        "current_tile_idx",
+        "target_tile_idx",
+        "next_tile_idx",
+        "path",
+        "path_target_tile_idx",
+    )
+
+    position: pygame.Vector2
+    # Position at the previous simulation step, to interpolate when rendering
+    previous_position: pygame.Vector2 | None
+    state: CharacterState
+    life_points: int
+    collision_box: pygame.Rect
+    # Hero and monsters are drawn at different times, see RenderLayer
+    render_layer: RenderLayer
+
     def __init__(self, game: Game, tile_idx: str) -> None:
         self.game = game
         self.surface = load_tile(tile_idx)
-        self.position = pygame.Vector2()
         self.current_tile_idx = pygame.Vector2()
         self.target_tile_idx: pygame.Vector2 | None = None
         self.next_tile_idx = self.current_tile_idx
-        self.state = CharacterState.IDLE
-        self.life_points = 1
-        self.collision_box = self.surface.get_rect().scale_by(0.8, 0.8)
+        # Remaining tiles towards the target, stored in reverse walking order
+        self.path: list[tuple[int, int]] = []
+        self.path_target_tile_idx: pygame.Vector2 | None = None
 
     def update(self, time_delta_in_secs: float) -> None:
         if self.state == CharacterState.IDLE:
@@ -52,7 +87,7 @@ class Character:
                 self.state = CharacterState.CHECK_MOVE
 
         elif self.state == CharacterState.CHECK_MOVE:
-            self.__set_next_tile_towards_target()
+            self._set_next_tile_towards_target()
             if self.__can_move_to_next_tile():
                 self.state = CharacterState.MOVE
             else:
@@ -64,7 +99,7 @@ class Character:
 
         elif self.state == CharacterState.REACHED_NEXT_TILE:
             self.current_tile_idx = self.next_tile_idx
-            self.position = tile_center(self.current_tile_idx)
+            self._move_to(self.game.tile_positions.center(self.current_tile_idx))
             if self.current_tile_idx == self.target_tile_idx:
                 self.state = CharacterState.REACHED_TARGET_TILE
             else:
@@ -76,6 +111,7 @@ class Character:
 
         elif self.state == CharacterState.BLOCKED:
             self.target_tile_idx = None
+            self.path = []
             self.next_tile_idx = self.current_tile_idx
             self.state = CharacterState.IDLE
 
@@ -83,44 +119,77 @@ class Character:
             raise RuntimeError("Invalid character state")
 
     def animate(self, time_delta_in_secs: float) -> None:
+        self.previous_position = store_previous_position(
+            self.previous_position, self.position
+        )
         if self.state == CharacterState.MOVE:
-            delta = (
-                (self.next_tile_idx - self.current_tile_idx)
+            # Component by component, so that no vector is allocated
+            self.position.x += (
+                (self.next_tile_idx[0] - self.current_tile_idx[0])
+                * HERO_SPEED
+                * time_delta_in_secs
+            )
+            self.position.y += (
+                (self.next_tile_idx[1] - self.current_tile_idx[1])
                 * HERO_SPEED
                 * time_delta_in_secs
             )
-            self.position += delta
             self.collision_box.center = self.position  # type: ignore
 
-    def render(self) -> None:
-        screen = pygame.display.get_surface()
-        character_rect = self.surface.get_rect(center=self.position)
-        screen.blit(self.surface, character_rect)
+    def _move_to(self, position: tuple[float, float]) -> None:
+        self.position.update(position)
+
+    def position_xy(self) -> tuple[float, float]:
+        return self.position.x, self.position.y
+
+    def _render_position(
+        self, interpolation: float
+    ) -> pygame.Vector2 | tuple[float, float]:
+        return interpolate_position(
+            self.previous_position, self.position, interpolation
+        )
+
+    def render(self, camera: Camera, interpolation: float = 1.0) -> pygame.Rect:
+        position = self._render_position(interpolation)
+        character_rect = render_queue.submit(
+            self.surface,
+            self.surface.get_rect(center=camera.to_screen(position)),
+            self.render_layer,
+        )
 
         if DEBUG_RENDER_CHARACTER_TILES:
             if self.target_tile_idx:
-                self.__render_tile_cursor(self.target_tile_idx, "red")
-            self.__render_tile_cursor(self.next_tile_idx, "green")
-            self.__render_tile_cursor(self.current_tile_idx, "blue")
+                self.__render_tile_cursor(camera, self.target_tile_idx, "red")
+            self.__render_tile_cursor(camera, self.next_tile_idx, "green")
+            self.__render_tile_cursor(camera, self.current_tile_idx, "blue")
 
         if DEBUG_RENDER_COLLISION_BOX:
-            pygame.draw.rect(screen, "black", self.collision_box, 3)
+            render_queue.submit_outline(
+                "black",
+                camera.rect_to_screen(self.collision_box),
+                3,
+                self.render_layer,
+            )
 
-    def __set_next_tile_towards_target(self) -> None:
-        if self.target_tile_idx:
-            self.next_tile_idx = self.current_tile_idx
-            dist_to_target_in_tiles = self.target_tile_idx - self.current_tile_idx
+        return character_rect
 
-            if abs(dist_to_target_in_tiles.x) > abs(dist_to_target_in_tiles.y):
-                if dist_to_target_in_tiles.x > 0:
-                    self.next_tile_idx = self.current_tile_idx + pygame.Vector2(1, 0)
-                elif dist_to_target_in_tiles.x < 0:
-                    self.next_tile_idx = self.current_tile_idx - pygame.Vector2(1, 0)
-            else:
-                if dist_to_target_in_tiles.y < 0:
-                    self.next_tile_idx = self.current_tile_idx - pygame.Vector2(0, 1)
-                elif dist_to_target_in_tiles.y > 0:
-                    self.next_tile_idx = self.current_tile_idx + pygame.Vector2(0, 1)
+    def _set_next_tile_towards_target(self) -> None:
+        self.next_tile_idx = self.current_tile_idx
+        if not self.target_tile_idx:
+            return
+
+        # Plan again when the target changed or someone stepped into the path
+        if (
+            not self.path
+            or self.path_target_tile_idx != self.target_tile_idx
+            or not self.game.is_walkable(self.path[-1])
+        ):
+            path = find_path(self.game, self.current_tile_idx, self.target_tile_idx)
+            self.path = list(reversed(path)) if path else []
+            self.path_target_tile_idx = pygame.Vector2(self.target_tile_idx)
+
+        if self.path:
+            self.next_tile_idx = pygame.Vector2(self.path.pop())
 
     def __can_move_to_next_tile(self) -> bool:
         if self.game:
@@ -133,152 +202,377 @@ class Character:
         return True
 
     def __has_reached_tile(self, tile_idx: pygame.Vector2 | tuple[int, int]) -> bool:
-        character_top_left = self.position - pygame.Vector2(TILE_RADIUS, TILE_RADIUS)
-        squared_dist_to_tile = character_top_left.distance_squared_to(
-            tile_top_left(tile_idx)
-        )
+        tile_left, tile_top = self.game.tile_positions.top_left(tile_idx)
+        x, y = self.position_xy()
+        delta_x = x - TILE_RADIUS - tile_left
+        delta_y = y - TILE_RADIUS - tile_top
+        squared_dist_to_tile = delta_x * delta_x + delta_y * delta_y
         return (
             squared_dist_to_tile
             <= CHARACTER_DISTANCE_TO_TILE_EPSILON * CHARACTER_DISTANCE_TO_TILE_EPSILON
         )
 
     def __render_tile_cursor(
-        self, tile_idx: pygame.Vector2 | tuple[int, int], color: str
+        self, camera: Camera, tile_idx: pygame.Vector2 | tuple[int, int], color: str
     ) -> None:
         tile_cursor = TileCursor()
         tile_cursor.color = color
         tile_cursor.position = tile_center(tile_idx)
         tile_cursor.animate()
-        tile_cursor.render()
+        tile_cursor.render(camera, self.render_layer)
 
 
 class Monster(Character):
-    def __init__(self, game: Game, tile_idx: str):
+    # View onto a slot of a character store, which holds where the monster is, its
+    # state and life points, and moves all monsters at once. Monsters have none of
+    # these until added to a store, which also gives them a new slot when monsters
+    # before them are removed.
+    __slots__ = ("store", "idx", "random", "countdown_in_secs", "flow_field")
+
+    render_layer = RenderLayer.MONSTERS
+
+    def __init__(
+        self, game: Game, tile_idx: str, rng: random.Random | None = None
+    ) -> None:
         super().__init__(game, tile_idx)
-        self.life_points = 3
-        self.countdown_in_secs = 5.0
+        self.idx = 0
+        self.random = rng if rng else game.random
+        # Time until the next decision, which rooms leave to their AI scheduler
+        self.countdown_in_secs = MONSTER_DECISION_INTERVAL_IN_SECS
+        self.flow_field: FlowField | None = None
+
+    # Properties build new vectors and rects from the store, so code running every step
+    # reads position_xy instead
+
+    @property
+    def position(self) -> pygame.Vector2:  # type: ignore[override]
+        return pygame.Vector2(
+            self.store.positions[2 * self.idx], self.store.positions[2 * self.idx + 1]
+        )
+
+    @property
+    def previous_position(self) -> pygame.Vector2:  # type: ignore[override]
+        return pygame.Vector2(
+            self.store.previous_positions[2 * self.idx],
+            self.store.previous_positions[2 * self.idx + 1],
+        )
+
+    @property
+    def state(self) -> CharacterState:  # type: ignore[override]
+        return CHARACTER_STATES[int(self.store.states[self.idx])]
+
+    @state.setter
+    def state(self, state: CharacterState) -> None:
+        # Walking is the only state in which the store moves the monster
+        self.store.states[self.idx] = state.value
+        if state == CharacterState.MOVE:
+            self.store.directions[2 * self.idx] = (
+                self.next_tile_idx[0] - self.current_tile_idx[0]
+            )
+            self.store.directions[2 * self.idx + 1] = (
+                self.next_tile_idx[1] - self.current_tile_idx[1]
+            )
+        else:
+            self.store.directions[2 * self.idx] = 0.0
+            self.store.directions[2 * self.idx + 1] = 0.0
+
+    @property
+    def life_points(self) -> int:  # type: ignore[override]
+        return int(self.store.life_points[self.idx])
 
-    def update(self, delta_time_in_secs: float):
-        super().update(delta_time_in_secs)
+    @life_points.setter
+    def life_points(self, life_points: int) -> None:
+        self.store.life_points[self.idx] = life_points
 
-        self.countdown_in_secs -= delta_time_in_secs
-        if self.countdown_in_secs <= 0:
-            self.countdown_in_secs = 5.0
-            self.trigger()
+    @property
+    def collision_box(self) -> pygame.Rect:  # type: ignore[override]
+        collision_box = pygame.Rect((0, 0), self.store.collision_size)
+        collision_box.center = self.position  # type: ignore
+        return collision_box
+
+    def animate(self, time_delta_in_secs: float) -> None:
+        # Moved along with all other monsters by the store
+        pass
+
+    def _move_to(self, position: tuple[float, float]) -> None:
+        self.store.move(self.idx, position)
+
+    def position_xy(self) -> tuple[float, float]:
+        return self.store.position_xy(self.idx)
+
+    def _render_position(self, interpolation: float) -> tuple[float, float]:
+        return self.store.interpolated_position_xy(self.idx, interpolation)
+
+    def think(self) -> float | None:
+        # Returns the time until the next decision
+        self.countdown_in_secs = MONSTER_DECISION_INTERVAL_IN_SECS
+        self.trigger()
+        return self.countdown_in_secs
 
     def trigger(self):
         pass
 
+    def _set_next_tile_towards_target(self) -> None:
+        # Chasing the goal of the shared flow field needs no search of its own
+        if (
+            self.flow_field
+            and self.flow_field.goal_tile_idx
+            and self.target_tile_idx
+            and are_same_tile(self.target_tile_idx, self.flow_field.goal_tile_idx)
+        ):
+            next_tile_idx = self.flow_field.next_tile(self.current_tile_idx)
+            self.next_tile_idx = pygame.Vector2(
+                next_tile_idx if next_tile_idx else self.current_tile_idx
+            )
+        else:
+            super()._set_next_tile_towards_target()
+
 
 class MonsterCrab(Monster):
-    def __init__(self, game: Game):
-        super().__init__(game, MONSTER_CRAB_TILE_FILE_IDX)
+    __slots__ = ()
+
+    def __init__(self, game: Game, rng: random.Random | None = None):
+        super().__init__(game, MONSTER_CRAB_TILE_FILE_IDX, rng)
 
     def trigger(self):
         super().trigger()
 
-        self.target_tile_idx = pygame.Vector2(-1, -1)
-        while not is_valid_tile(self.target_tile_idx):
-            direction = random.choice(
-                [
-                    pygame.Vector2(-1, 0),
-                    pygame.Vector2(+1, 0),
-                    pygame.Vector2(0, -1),
-                    pygame.Vector2(0, +1),
-                ]
-            )
-            distance = random.randint(1, 5)
-            self.target_tile_idx = self.current_tile_idx + direction * distance
+        if (
+            self.flow_field
+            and self.flow_field.goal_tile_idx
+            and self.flow_field.distance(self.current_tile_idx) is not None
+            and self.random.random() < MONSTER_CRAB_CHASE_PROBABILITY
+        ):
+            self.target_tile_idx = pygame.Vector2(self.flow_field.goal_tile_idx)
+            self.countdown_in_secs += self.random.uniform(-2.0, +2.0)
+            return
+
+        # Any walkable tile a few tiles away in a straight line, all equally likely
+        target_tile_idx = self.game.wander_reach.random_target(
+            (int(self.current_tile_idx[0]), int(self.current_tile_idx[1])), self.random
+        )
+        self.target_tile_idx = (
+            pygame.Vector2(target_tile_idx) if target_tile_idx else None
+        )
 
-        self.countdown_in_secs += random.uniform(-2.0, +2.0)
+        self.countdown_in_secs += self.random.uniform(-2.0, +2.0)
 
 
 class Hero(Character):
+    __slots__ = (
+        "position",
+        "previous_position",
+        "state",
+        "life_points",
+        "collision_box",
+        "weapon",
+    )
+
+    render_layer = RenderLayer.HERO
+
     def __init__(self, game: Game) -> None:
         super().__init__(game, HERO_TILE_FILE_IDX)
+        self.position = pygame.Vector2()
+        self.previous_position = None
+        self.state = CharacterState.IDLE
+        self.life_points = 1
+        self.collision_box = self.surface.get_rect().scale_by(
+            CHARACTER_COLLISION_BOX_SCALE, CHARACTER_COLLISION_BOX_SCALE
+        )
         self.weapon = Weapon()
 
     def animate(self, time_delta_in_secs: float) -> None:
         super().animate(time_delta_in_secs)
-        self.weapon.position = self.position + WEAPON_POSITION_DELTA
+        self.weapon.previous_position = store_previous_position(
+            self.weapon.previous_position, self.weapon.position
+        )
+        self.weapon.position.update(self.position)
+        self.weapon.position += WEAPON_POSITION_DELTA
 
-    def render(self) -> None:
-        super().render()
-        self.weapon.render()
+    def render(self, camera: Camera, interpolation: float = 1.0) -> pygame.Rect:
+        hero_rect = super().render(camera, interpolation)
+        return hero_rect.union(self.weapon.render(camera, interpolation))
 
 
 class Weapon:
+    __slots__ = ("surface", "position", "previous_position")
+
     def __init__(self) -> None:
         self.surface = load_tile(WEAPON_TILE_FILE_IDX)
         self.surface = pygame.transform.rotozoom(
             self.surface, WEAPON_IDLE_ANGLE_IN_DEGREES, 1.0
         )
         self.position = pygame.Vector2()
+        self.previous_position: pygame.Vector2 | None = None
 
-    def render(self) -> None:
-        screen = pygame.display.get_surface()
-        weapon_rect = self.surface.get_rect(center=self.position)
-        screen.blit(self.surface, weapon_rect)
+    def render(self, camera: Camera, interpolation: float = 1.0) -> pygame.Rect:
+        position = interpolate_position(
+            self.previous_position, self.position, interpolation
+        )
+        return render_queue.submit(
+            self.surface,
+            self.surface.get_rect(center=camera.to_screen(position)),
+            RenderLayer.HERO,
+        )
 
 
 class Fireball:
+    __slots__ = (
+        "surface",
+        "rotated_sprite",
+        "position",
+        "previous_position",
+        "direction",
+        "angle",
+        "collision_box",
+    )
+
     def __init__(self) -> None:
         self.surface = load_tile(FIREBALL_TILE_FILE_IDX)
+        self.rotated_sprite = load_rotated_tile(FIREBALL_TILE_FILE_IDX, 0.8)
         self.position = pygame.Vector2()
+        self.previous_position: pygame.Vector2 | None = None
         self.direction = pygame.Vector2()
         self.angle = 0.0
         self.collision_box = self.surface.get_rect().scale_by(0.8, 0.8)
 
+    def reset(self) -> None:
+        self.position.update(0.0, 0.0)
+        self.previous_position = None
+        self.direction.update(0.0, 0.0)
+        self.angle = 0.0
+        self.collision_box.center = (0, 0)
+
     def animate(self, time_delta_in_secs) -> None:
+        self.previous_position = store_previous_position(
+            self.previous_position, self.position
+        )
         self.angle += FIREBALL_ROTATION_SPEED * time_delta_in_secs
         if self.angle >= 90.0:
             self.angle = 0.0
 
-        self.position += self.direction * FIREBALL_SPEED * time_delta_in_secs
+        self.position.x += self.direction.x * FIREBALL_SPEED * time_delta_in_secs
+        self.position.y += self.direction.y * FIREBALL_SPEED * time_delta_in_secs
         self.collision_box.center = self.position  # type: ignore
 
-    def render(self) -> None:
-        screen = pygame.display.get_surface()
-        rotated_surface = pygame.transform.rotozoom(self.surface, self.angle, 0.8)
-        surface_rect = rotated_surface.get_rect(center=self.position)
-        screen.blit(rotated_surface, surface_rect)
+    def render(self, camera: Camera, interpolation: float = 1.0) -> pygame.Rect:
+        rotated_surface = self.rotated_sprite.get(self.angle)
+        position = interpolate_position(
+            self.previous_position, self.position, interpolation
+        )
+        surface_rect = render_queue.submit(
+            rotated_surface,
+            rotated_surface.get_rect(center=camera.to_screen(position)),
+            RenderLayer.FIREBALL,
+        )
 
         if DEBUG_RENDER_COLLISION_BOX:
-            pygame.draw.rect(screen, "black", self.collision_box, 3)
+            render_queue.submit_outline(
+                "black",
+                camera.rect_to_screen(self.collision_box),
+                3,
+                RenderLayer.FIREBALL,
+            )
+
+        return surface_rect
 
 
 class Laser:
-    def __init__(self) -> None:
-        self.surface = load_tile(LASER_TILE_FILE_IDX)
-        self.position = pygame.Vector2()
-        self.direction = pygame.Vector2()
-        self.angle = 0.0
-        self.collision_box = self.surface.get_rect().scale_by(0.6, 0.6)
+    # View onto a slot of a projectile store, which holds the actual data and moves
+    # all lasers at once. A view is only valid until lasers before it are removed.
+    __slots__ = ("store", "idx", "rotated_sprite")
+
+    def __init__(self, store: "ProjectileStore", idx: int) -> None:
+        self.store = store
+        self.idx = idx
+        # Loaded when first rendered, as stores may be built on worker threads
+        self.rotated_sprite: RotatedSprite | None = None
+
+    # Properties build new vectors and rects from the store, so rendering reads the
+    # store directly
+
+    @property
+    def position(self) -> pygame.Vector2:
+        return pygame.Vector2(
+            self.store.positions[2 * self.idx], self.store.positions[2 * self.idx + 1]
+        )
 
-    def animate(self, time_delta_in_secs) -> None:
-        self.position += self.direction * LASER_SPEED * time_delta_in_secs
-        self.collision_box.center = self.position  # type: ignore
+    @property
+    def previous_position(self) -> pygame.Vector2:
+        return pygame.Vector2(
+            self.store.previous_positions[2 * self.idx],
+            self.store.previous_positions[2 * self.idx + 1],
+        )
+
+    @property
+    def direction(self) -> pygame.Vector2:
+        return pygame.Vector2(
+            self.store.directions[2 * self.idx], self.store.directions[2 * self.idx + 1]
+        )
+
+    @property
+    def angle(self) -> float:
+        return float(self.store.angles[self.idx])
+
+    @property
+    def collision_box(self) -> pygame.Rect:
+        collision_box = pygame.Rect((0, 0), self.store.collision_size)
+        collision_box.center = self.position  # type: ignore
+        return collision_box
 
-    def render(self) -> None:
-        screen = pygame.display.get_surface()
-        rotated_surface = pygame.transform.rotozoom(self.surface, self.angle, 0.6)
-        surface_rect = rotated_surface.get_rect(center=self.position)
-        screen.blit(rotated_surface, surface_rect)
+    def render(self, camera: Camera, interpolation: float = 1.0) -> pygame.Rect:
+        if not self.rotated_sprite:
+            self.rotated_sprite = load_rotated_tile(
+                LASER_TILE_FILE_IDX, LASER_SPRITE_SCALE
+            )
+
+        rotated_surface = self.rotated_sprite.get(self.store.angles[self.idx])
+        position = self.store.interpolated_position_xy(self.idx, interpolation)
+        surface_rect = render_queue.submit(
+            rotated_surface,
+            rotated_surface.get_rect(center=camera.to_screen(position)),
+            RenderLayer.LASERS,
+        )
 
         if DEBUG_RENDER_COLLISION_BOX:
-            pygame.draw.rect(screen, "black", self.collision_box, 3)
+            render_queue.submit_outline(
+                "black",
+                camera.rect_to_screen(self.collision_box),
+                3,
+                RenderLayer.LASERS,
+            )
+
+        return surface_rect
 
 
 class LifeIndicator:
+    __slots__ = ("game", "surface", "heart_rects")
+
     def __init__(self, game: Game) -> None:
         self.game = game
         self.surface = load_tile(HEART_TILE_FILE_IDX)
         self.surface = pygame.transform.scale_by(self.surface, 0.5)
+        # Hearts never move, their rects are computed once per number of life points
+        self.heart_rects: list[pygame.Rect] = []
+
+    def render(self) -> pygame.Rect:
+        while len(self.heart_rects) < self.game.hero_life_points:
+            position = (
+                TILE_RADIUS + 10 + len(self.heart_rects) * self.surface.get_width(),
+                TILE_RADIUS + 10,
+            )
+            self.heart_rects.append(self.surface.get_rect(center=position))
+
+        life_indicator_rect = self.surface.get_rect(
+            center=(TILE_RADIUS + 10, TILE_RADIUS + 10)
+        )
+        life_indicator_rect.width = 0
+        for heart_rect in self.heart_rects[: self.game.hero_life_points]:
+            render_queue.submit(self.surface, heart_rect, RenderLayer.HUD)
+            life_indicator_rect.union_ip(heart_rect)
+
+        return life_indicator_rect
+
 
-    def render(self) -> None:
-        screen = pygame.display.get_surface()
-        position = pygame.Vector2(TILE_RADIUS + 10, TILE_RADIUS + 10)
-        for _ in range(self.game.hero_life_points):
-            surface_rect = self.surface.get_rect(center=position)
-            screen.blit(self.surface, surface_rect)
-            position.x += self.surface.get_width()
+# Fireballs are recycled across rooms instead of being allocated on every shot
+fireball_pool: ObjectPool[Fireball] = ObjectPool(Fireball, FIREBALL_POOL_CAPACITY)
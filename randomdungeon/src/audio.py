@@ -0,0 +1,98 @@
+import collections
+import pygame
+
+from globals import *
+
+
+class AudioManager:
+    # Music is streamed by pygame.mixer.music instead of being fully decoded in memory,
+    # and only started or stopped on state changes. Effects play on channels reserved
+    # for them, so that the mixer never has to find or allocate one while playing.
+
+    def __init__(self) -> None:
+        self.effects: dict[str, pygame.mixer.Sound] = {}
+        # Least recently started first, to steal the oldest voice when all are busy
+        self.effect_channels: collections.deque[pygame.mixer.Channel] = (
+            collections.deque()
+        )
+        self.music_path: Path | None = None
+
+        self.num_effects_played = 0
+        self.num_effects_stolen = 0
+        self.num_effects_dropped = 0
+
+    def init(self, num_effect_channels: int = AUDIO_NUM_EFFECT_CHANNELS) -> None:
+        # Needs an initialized mixer
+        if pygame.mixer.get_num_channels() < num_effect_channels:
+            pygame.mixer.set_num_channels(num_effect_channels)
+        pygame.mixer.set_reserved(num_effect_channels)
+        self.effect_channels = collections.deque(
+            pygame.mixer.Channel(channel_idx)
+            for channel_idx in range(num_effect_channels)
+        )
+
+        for name, file_name in AUDIO_EFFECT_FILE_NAMES.items():
+            self.effects[name] = pygame.mixer.Sound(AUDIO_EFFECTS_PATH / file_name)
+
+    def play_music(
+        self,
+        file_name: str = AUDIO_MUSIC_FILE_NAME,
+        volume: float = AUDIO_MUSIC_VOLUME,
+        fade_in_ms: int = AUDIO_MUSIC_FADE_IN_MS,
+    ) -> None:
+        music_path = AUDIO_MUSIC_PATH / file_name
+        if music_path == self.music_path and pygame.mixer.music.get_busy():
+            return
+
+        pygame.mixer.music.load(music_path)
+        pygame.mixer.music.set_volume(volume)
+        pygame.mixer.music.play(loops=-1, fade_ms=fade_in_ms)
+        self.music_path = music_path
+
+    def stop_music(self) -> None:
+        if self.music_path is None:
+            return
+
+        pygame.mixer.music.stop()
+        pygame.mixer.music.unload()
+        self.music_path = None
+
+    def play_effect(self, name: str) -> bool:
+        sound = self.effects.get(name)
+        if not sound or not self.effect_channels:
+            return False
+
+        # Voice limiting: the same effect stacked many times only gets louder
+        if sound.get_num_channels() >= AUDIO_MAX_VOICES_PER_EFFECT:
+            self.num_effects_dropped += 1
+            return False
+
+        channel = next(
+            (channel for channel in self.effect_channels if not channel.get_busy()),
+            None,
+        )
+        if not channel:
+            channel = self.effect_channels[0]
+            self.num_effects_stolen += 1
+        self.effect_channels.remove(channel)
+        self.effect_channels.append(channel)
+
+        channel.play(sound)
+        self.num_effects_played += 1
+        return True
+
+    def clear(self) -> None:
+        self.stop_music()
+        for channel in self.effect_channels:
+            channel.stop()
+        self.effect_channels.clear()
+        self.effects.clear()
+
+    def stats(self) -> str:
+        return (
+            f"{self.num_effects_played} played, {self.num_effects_stolen} stolen, "
+            f"{self.num_effects_dropped} dropped"
+        )
+
+
+audio = AudioManager()
@@ -0,0 +1,194 @@
+import concurrent.futures
+import csv
+import json
+import os
+import sys
+import time
+
+from bots import *
+from engine import *
+
+BATCH_COLUMNS = [
+    "seed",
+    "bot",
+    "level",
+    "game_over",
+    "damage_taken",
+    "sim_steps",
+    "sim_secs",
+    "mean_secs_per_level",
+    "max_secs_per_level",
+    "wall_secs",
+    "sim_steps_per_sec",
+]
+
+
+class SimulationConfig:
+    def __init__(
+        self,
+        seed: int,
+        bot: str = "hunter",
+        max_sim_steps: int = BATCH_MAX_SIM_STEPS,
+        map_size_in_tiles: tuple[int, int] | None = None,
+    ) -> None:
+        self.seed = seed
+        self.bot = bot
+        self.max_sim_steps = max_sim_steps
+        self.map_size_in_tiles = map_size_in_tiles
+
+
+def run_simulation(config: SimulationConfig) -> dict[str, int | float | str]:
+    # Plays a single game, from the menu to game over or to the step limit. Runs in a
+    # worker process, with its own pygame and its own singletons.
+    start_time_in_secs = time.perf_counter()
+    with Engine(
+        headless=True,
+        input_script=BOTS[config.bot](config.seed),
+        seed=config.seed,
+        map_size_in_tiles=config.map_size_in_tiles,
+    ) as engine:
+        game = engine.game
+        level_start_sim_step: int | None = None
+        level_durations_in_steps = []
+        damage_taken = 0
+        is_game_over = False
+
+        while engine.num_sim_steps < config.max_sim_steps:
+            level, life_points = game.level, game.hero_life_points
+            engine.step()
+            damage_taken += max(life_points - game.hero_life_points, 0)
+
+            if game.state != GameState.PLAY:
+                if level_start_sim_step is not None:
+                    is_game_over = True
+                    break
+                continue
+
+            if level_start_sim_step is None:
+                level_start_sim_step = engine.num_sim_steps
+            if game.level > level:
+                level_durations_in_steps.append(
+                    engine.num_sim_steps - level_start_sim_step
+                )
+                level_start_sim_step = engine.num_sim_steps
+
+        wall_time_in_secs = time.perf_counter() - start_time_in_secs
+        level_durations_in_secs = [
+            num_steps * SIM_TIME_STEP_IN_SECS for num_steps in level_durations_in_steps
+        ]
+        return {
+            "seed": config.seed,
+            "bot": config.bot,
+            "level": game.level,
+            "game_over": int(is_game_over),
+            "damage_taken": damage_taken,
+            "sim_steps": engine.num_sim_steps,
+            "sim_secs": engine.num_sim_steps * SIM_TIME_STEP_IN_SECS,
+            "mean_secs_per_level": (
+                sum(level_durations_in_secs) / len(level_durations_in_secs)
+                if level_durations_in_secs
+                else 0.0
+            ),
+            "max_secs_per_level": max(level_durations_in_secs, default=0.0),
+            "wall_secs": wall_time_in_secs,
+            "sim_steps_per_sec": engine.num_sim_steps / wall_time_in_secs,
+        }
+
+
+def run_batch(
+    configs: list[SimulationConfig], num_workers: int | None = None
+) -> list[dict[str, int | float | str]]:
+    # Simulations share nothing, so they spread over processes rather than threads,
+    # which would all wait on the same interpreter lock
+    num_workers = num_workers or os.cpu_count() or 1
+    if num_workers == 1:
+        return [run_simulation(config) for config in configs]
+
+    with concurrent.futures.ProcessPoolExecutor(num_workers) as executor:
+        return list(executor.map(run_simulation, configs))
+
+
+def write_results(results: list[dict[str, int | float | str]], path: str) -> None:
+    # One column per statistic, either as CSV or as JSON lists
+    if path.endswith(".json"):
+        with open(path, "w") as results_file:
+            json.dump(
+                {
+                    column: [result[column] for result in results]
+                    for column in BATCH_COLUMNS
+                },
+                results_file,
+            )
+        return
+
+    with open(path, "w", newline="") as results_file:
+        writer = csv.DictWriter(results_file, BATCH_COLUMNS)
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def summarize(results: list[dict[str, int | float | str]]) -> str:
+    num_results = len(results)
+    levels = [int(result["level"]) for result in results]
+    return (
+        f"{num_results} games, level mean {sum(levels) / num_results:.2f} "
+        f"max {max(levels)}, "
+        f"{sum(int(result['game_over']) for result in results)} game overs, "
+        "damage mean "
+        f"{sum(int(result['damage_taken']) for result in results) / num_results:.2f}"
+    )
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Random Dungeon batch simulations")
+    parser.add_argument(
+        "--games", type=int, default=100, help="number of games to simulate"
+    )
+    parser.add_argument(
+        "--seed", type=int, default=0, help="seed of the first game, then counting up"
+    )
+    parser.add_argument("--bot", choices=list(BOTS), default="hunter")
+    parser.add_argument(
+        "--max-steps",
+        type=int,
+        default=BATCH_MAX_SIM_STEPS,
+        help="stop games still going after this many simulation steps",
+    )
+    parser.add_argument(
+        "--map-size",
+        type=lambda value: tuple(int(size) for size in value.split("x")),
+        metavar="WIDTHxHEIGHT",
+        help="size of the dungeon in tiles, the window size by default",
+    )
+    parser.add_argument(
+        "--workers", type=int, help="number of processes, one per core by default"
+    )
+    parser.add_argument(
+        "--output",
+        metavar="PATH",
+        default=BATCH_OUTPUT_PATH,
+        help="write the results here, as JSON columns if it ends with .json",
+    )
+    args = parser.parse_args()
+
+    configs = [
+        SimulationConfig(seed, args.bot, args.max_steps, args.map_size)
+        for seed in range(args.seed, args.seed + args.games)
+    ]
+    start_time_in_secs = time.perf_counter()
+    results = run_batch(configs, args.workers)
+    wall_time_in_secs = time.perf_counter() - start_time_in_secs
+
+    write_results(results, args.output)
+    print(summarize(results))
+    print(
+        f"{sum(int(result['sim_steps']) for result in results) / wall_time_in_secs:.0f} "
+        f"simulation steps/s over {wall_time_in_secs:.1f} s",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
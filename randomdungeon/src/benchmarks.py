@@ -0,0 +1,355 @@
+import itertools
+import json
+import platform
+import sys
+import time
+import tracemalloc
+import typing
+
+from engine import *
+
+BENCHMARK_FORMAT_VERSION = 1
+
+
+class BenchmarkScenario:
+    def __init__(
+        self,
+        name: str,
+        num_monsters: int,
+        num_lasers: int,
+        map_size_in_tiles: tuple[int, int],
+    ) -> None:
+        self.name = name
+        self.num_monsters = num_monsters
+        self.num_lasers = num_lasers
+        self.map_size_in_tiles = map_size_in_tiles
+
+    def to_dict(self) -> dict:
+        return {
+            "num_monsters": self.num_monsters,
+            "num_lasers": self.num_lasers,
+            "map_size_in_tiles": list(self.map_size_in_tiles),
+        }
+
+
+BENCHMARK_SCENARIOS = [
+    BenchmarkScenario("classic", 3, 0, window_size_in_tiles()),
+    BenchmarkScenario("crowded", 40, 64, window_size_in_tiles()),
+    BenchmarkScenario("large", 300, 128, (64, 48)),
+    BenchmarkScenario("barrage", 300, 2048, (64, 48)),
+]
+
+
+class SyntheticMonsterRoom:
+    # Monster room kept under constant load: lasers leaving the room are replaced by
+    # new ones, and the hero never dies
+
+    def __init__(self, scenario: BenchmarkScenario, seed: int) -> None:
+        self.scenario = scenario
+        self.game = Game(scenario.map_size_in_tiles, seed)
+        self.game.state = GameState.PLAY
+        self.random = random.Random(seed)
+
+        self.room = self.create_room(seed)
+        self.room.hero.current_tile_idx = pygame.Vector2(self.room.spawn_tile_idx)
+        self.room.enter()
+        self.top_up_lasers()
+
+    def create_room(self, seed: int) -> MonsterRoom:
+        return MonsterRoom(self.game, self.scenario.num_monsters, seed)
+
+    def top_up_lasers(self) -> None:
+        self.game.hero_life_points = 3
+
+        room = self.room
+        while room.monsters and len(room.lasers) < self.scenario.num_lasers:
+            monster = self.random.choice(room.monsters)
+            direction = pygame.Vector2(0.0, -1.0).rotate(
+                self.random.uniform(0.0, 360.0)
+            )
+            if not room.lasers.add(
+                monster.position + direction * TILE_RADIUS,
+                direction,
+                direction.angle_to(pygame.Vector2(0.0, -1.0)),
+            ):
+                break
+
+    def load_projectiles(self) -> None:
+        # Lasers moved by a step, and a fireball on its way to a monster, so that the
+        # collision code of the room has as much as possible to check. Monsters hit by
+        # the fireball get their life points back.
+        room = self.room
+        self.top_up_lasers()
+        if not room.fireball and room.monsters:
+            room._MonsterRoom__shoot_fireball(self.random.choice(room.monsters))  # type: ignore
+        for monster in room.monsters:
+            monster.life_points = 3
+
+        room.lasers.animate(SIM_TIME_STEP_IN_SECS)
+        if room.fireball:
+            room.fireball.animate(SIM_TIME_STEP_IN_SECS)
+
+    def update_projectiles(self) -> None:
+        # The part of a room update checking collisions, as run every step
+        self.room._update_fireball()
+        self.room._update_lasers()
+
+    def invalidate_spatial_hashes(self) -> None:
+        # As after entities moved
+        self.room.monsters.is_spatial_hash_dirty = True
+        self.room.lasers.is_spatial_hash_dirty = True
+
+    def update_spatial_hashes(self) -> None:
+        self.room.monsters.update_spatial_hash()
+        self.room.lasers.update_spatial_hash()
+
+    # Queries of a room step once spatial hashes are up to date, which only depend on
+    # the entities around the hero or in view, not on how many there are in the room
+
+    def query_collisions(self) -> None:
+        room = self.room
+        room.lasers.colliding(room.hero.collision_box)
+        room.monsters.colliding(room.hero.collision_box)
+
+    def query_viewport(self) -> None:
+        room = self.room
+        room.monsters.query(room.render_camera.rect)
+        room.lasers.query(room.render_camera.rect)
+
+    def exit(self) -> None:
+        self.room.exit()
+
+
+def timing_stats(times_in_ns: list[int]) -> dict[str, float]:
+    times_in_ms = [time_in_ns / 1e6 for time_in_ns in times_in_ns]
+    percentiles = profiler.percentiles(times_in_ms)
+    total_time_in_secs = sum(times_in_ns) / 1e9
+    return {
+        "iterations": len(times_in_ms),
+        "mean_ms": sum(times_in_ms) / len(times_in_ms),
+        "p50_ms": percentiles["p50"],
+        "p95_ms": percentiles["p95"],
+        "ops_per_sec": (
+            len(times_in_ms) / total_time_in_secs if total_time_in_secs else 0.0
+        ),
+    }
+
+
+def allocation_stats(
+    function: typing.Callable[[], object],
+    setup: typing.Callable[[], object] | None = None,
+    num_iterations: int = BENCHMARK_NUM_ALLOCATION_ITERATIONS,
+) -> dict[str, float]:
+    # Separate pass, as tracing allocations slows them down a lot
+    peak_sizes, net_sizes = [], []
+    tracemalloc.start()
+    for _ in range(num_iterations):
+        if setup:
+            setup()
+        tracemalloc.reset_peak()
+        start_size, _ = tracemalloc.get_traced_memory()
+        function()
+        end_size, peak_size = tracemalloc.get_traced_memory()
+        peak_sizes.append(peak_size - start_size)
+        net_sizes.append(end_size - start_size)
+    tracemalloc.stop()
+
+    return {
+        "peak_alloc_kib": max(peak_sizes) / 1024,
+        "net_alloc_kib": sum(net_sizes) / len(net_sizes) / 1024,
+    }
+
+
+def measure(
+    function: typing.Callable[[], object],
+    setup: typing.Callable[[], object] | None = None,
+    num_iterations: int = BENCHMARK_NUM_ITERATIONS,
+) -> dict[str, float]:
+    times_in_ns = []
+    for _ in range(num_iterations):
+        if setup:
+            setup()
+        start_time_in_ns = time.perf_counter_ns()
+        function()
+        times_in_ns.append(time.perf_counter_ns() - start_time_in_ns)
+
+    return timing_stats(times_in_ns) | allocation_stats(function, setup)
+
+
+def measure_ticks(
+    synthetic_room: SyntheticMonsterRoom, num_ticks: int = BENCHMARK_NUM_TICKS
+) -> dict[str, float]:
+    room = synthetic_room.room
+    phase_times_in_ns: dict[str, list[int]] = {
+        "update": [],
+        "animate": [],
+        "render": [],
+    }
+    tick_times_in_ns = []
+
+    for _ in range(num_ticks):
+        synthetic_room.top_up_lasers()
+
+        start_time_in_ns = time.perf_counter_ns()
+        room.update(SIM_TIME_STEP_IN_SECS)
+        update_time_in_ns = time.perf_counter_ns()
+        room.animate(SIM_TIME_STEP_IN_SECS)
+        animate_time_in_ns = time.perf_counter_ns()
+        room.render()
+        render_time_in_ns = time.perf_counter_ns()
+
+        phase_times_in_ns["update"].append(update_time_in_ns - start_time_in_ns)
+        phase_times_in_ns["animate"].append(animate_time_in_ns - update_time_in_ns)
+        phase_times_in_ns["render"].append(render_time_in_ns - animate_time_in_ns)
+        tick_times_in_ns.append(render_time_in_ns - start_time_in_ns)
+
+    stats = timing_stats(tick_times_in_ns)
+    for phase_name, times_in_ns in phase_times_in_ns.items():
+        phase_stats = timing_stats(times_in_ns)
+        stats[f"{phase_name}_mean_ms"] = phase_stats["mean_ms"]
+        stats[f"{phase_name}_p95_ms"] = phase_stats["p95_ms"]
+
+    def tick() -> None:
+        synthetic_room.top_up_lasers()
+        room.update(SIM_TIME_STEP_IN_SECS)
+        room.animate(SIM_TIME_STEP_IN_SECS)
+        room.render()
+
+    return stats | allocation_stats(tick)
+
+
+def run_scenario(scenario: BenchmarkScenario, seed: int) -> dict[str, dict]:
+    synthetic_room = SyntheticMonsterRoom(scenario, seed)
+    room = synthetic_room.room
+    seeds = itertools.count(seed)
+
+    def construct_room() -> None:
+        synthetic_room.create_room(next(seeds)).exit()
+
+    def load_tiles() -> None:
+        for file_idx in DUNGEON_TILE_FILE_IDXS.values():
+            load_tile(file_idx)
+
+    results = {
+        "room_construction": measure(construct_room),
+        "update_game_map": measure(room._update_game_map),
+        # Private to the room, which only calls it when the background is dirty
+        "render_tile_map": measure(room._DungeonRoom__render_tile_map),  # type: ignore
+        "projectile_collisions": measure(
+            synthetic_room.update_projectiles, setup=synthetic_room.load_projectiles
+        ),
+        "spatial_hash_rebuild": measure(
+            synthetic_room.update_spatial_hashes,
+            setup=synthetic_room.invalidate_spatial_hashes,
+        ),
+        "collision_queries": measure(
+            synthetic_room.query_collisions, setup=synthetic_room.update_spatial_hashes
+        ),
+        "viewport_queries": measure(
+            synthetic_room.query_viewport, setup=synthetic_room.update_spatial_hashes
+        ),
+        "load_tile": measure(load_tiles, setup=tile_cache.clear),
+        "load_tile_cached": measure(load_tiles),
+        "ticks": measure_ticks(synthetic_room),
+    }
+
+    synthetic_room.exit()
+    tile_cache.preload(PRELOAD_TILE_FILE_IDXS)
+    return results
+
+
+def run_benchmarks(
+    scenarios: list[BenchmarkScenario], seed: int = BENCHMARK_SEED
+) -> dict:
+    with Engine(headless=True, render=True, seed=seed):
+        return {
+            "version": BENCHMARK_FORMAT_VERSION,
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "seed": seed,
+            "scenarios": {
+                scenario.name: {
+                    "config": scenario.to_dict(),
+                    "results": run_scenario(scenario, seed),
+                }
+                for scenario in scenarios
+            },
+        }
+
+
+def compare_to_baseline(
+    report: dict,
+    baseline: dict,
+    tolerance: float = BENCHMARK_REGRESSION_TOLERANCE,
+) -> list[str]:
+    regressions = []
+    for scenario_name, scenario in report["scenarios"].items():
+        baseline_scenario = baseline["scenarios"].get(scenario_name)
+        if not baseline_scenario:
+            continue
+
+        for name, stats in scenario["results"].items():
+            baseline_stats = baseline_scenario["results"].get(name)
+            if not baseline_stats or not baseline_stats["mean_ms"]:
+                continue
+
+            ratio = stats["mean_ms"] / baseline_stats["mean_ms"]
+            stats["baseline_ratio"] = ratio
+            if ratio > 1.0 + tolerance:
+                regressions.append(
+                    f"{scenario_name}/{name}: {stats['mean_ms']:.3f} ms, "
+                    f"{ratio:.2f}x the baseline {baseline_stats['mean_ms']:.3f} ms"
+                )
+    return regressions
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Random Dungeon benchmarks")
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=[scenario.name for scenario in BENCHMARK_SCENARIOS],
+        help="only run this scenario, can be repeated",
+    )
+    parser.add_argument("--output", metavar="PATH", help="write the report here")
+    parser.add_argument(
+        "--baseline", metavar="PATH", help="compare against a previous report"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=BENCHMARK_REGRESSION_TOLERANCE,
+        help="slowdown allowed before a benchmark counts as a regression",
+    )
+    args = parser.parse_args()
+
+    scenarios = [
+        scenario
+        for scenario in BENCHMARK_SCENARIOS
+        if not args.scenario or scenario.name in args.scenario
+    ]
+    report = run_benchmarks(scenarios)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare_to_baseline(
+                report, json.load(baseline_file), args.tolerance
+            )
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    for regression in regressions:
+        print(f"Regression: {regression}", file=sys.stderr)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import pygame
+import random
+
+from globals import *
+from rooms import *
+
+
+class RandomClickBot:
+    # Input script clicking on random positions of the window, enough to get through
+    # the menus and to keep the hero and the monsters busy
+
+    def __init__(self, seed: int | None = None, clicks_per_sec: float = 2.0) -> None:
+        self.random = random.Random(seed)
+        self.clicks_per_sec = clicks_per_sec
+
+    def __call__(self, engine) -> list[pygame.event.Event]:
+        if self.random.random() >= self.clicks_per_sec * engine.frame_time_in_secs:
+            return []
+
+        position = (
+            self.random.randrange(WINDOW_WIDTH),
+            self.random.randrange(WINDOW_HEIGHT),
+        )
+        return [
+            pygame.event.Event(
+                pygame.MOUSEMOTION, pos=position, rel=(0, 0), buttons=(0, 0, 0)
+            ),
+            pygame.event.Event(
+                pygame.MOUSEBUTTONDOWN, pos=position, button=pygame.BUTTON_LEFT
+            ),
+        ]
+
+
+class HunterBot:
+    # Input script playing like a focused player: it shoots at the closest monster in
+    # sight, or else walks towards the closest one, and walks to the closest exit once
+    # the room is cleared. Clicks stay within the window, so far away targets are
+    # approached by walking towards them.
+
+    def __init__(self, seed: int | None = None, clicks_per_sec: float = 4.0) -> None:
+        self.random = random.Random(seed)
+        self.clicks_per_sec = clicks_per_sec
+
+    def __call__(self, engine) -> list[pygame.event.Event]:
+        if self.random.random() >= self.clicks_per_sec * engine.frame_time_in_secs:
+            return []
+
+        room = engine.room
+        if isinstance(room, MonsterRoom) and (room.monsters or room.exits):
+            if room.monsters:
+                monster_positions = [
+                    monster.position
+                    for monster in room.monsters
+                    if has_line_of_sight(
+                        engine.game.map,
+                        room.hero.position,
+                        monster.position,
+                        GameObjectType.OBSTACLE,
+                    )
+                ] or [monster.position for monster in room.monsters]
+                target = min(
+                    monster_positions, key=room.hero.position.distance_squared_to
+                )
+            else:
+                target = min(
+                    (tile_center(exit_tile_idx) for exit_tile_idx in room.exits),
+                    key=room.hero.position.distance_squared_to,
+                )
+            screen_target = room.camera.to_screen(target)
+            position = (
+                min(max(int(screen_target.x), 0), WINDOW_WIDTH - 1),
+                min(max(int(screen_target.y), 0), WINDOW_HEIGHT - 1),
+            )
+        else:
+            position = (
+                self.random.randrange(WINDOW_WIDTH),
+                self.random.randrange(WINDOW_HEIGHT),
+            )
+
+        return [
+            pygame.event.Event(
+                pygame.MOUSEMOTION, pos=position, rel=(0, 0), buttons=(0, 0, 0)
+            ),
+            pygame.event.Event(
+                pygame.MOUSEBUTTONDOWN, pos=position, button=pygame.BUTTON_LEFT
+            ),
+        ]
+
+
+BOTS = {
+    "random": RandomClickBot,
+    "hunter": HunterBot,
+}
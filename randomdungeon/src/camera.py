@@ -0,0 +1,64 @@
+import math
+import pygame
+
+from globals import *
+from utils import *
+
+
+class Camera:
+    # Window onto a world larger than the screen. Everything in rooms lives in world
+    # coordinates, and is only converted to screen coordinates when drawn.
+
+    def __init__(
+        self,
+        world_size: tuple[int, int],
+        viewport_size: tuple[int, int] = (WINDOW_WIDTH, WINDOW_HEIGHT),
+    ) -> None:
+        self.world_rect = pygame.Rect((0, 0), world_size)
+        self.rect = pygame.Rect((0, 0), viewport_size)
+
+    def follow(self, position: pygame.Vector2 | tuple[float, float]) -> None:
+        # Worlds smaller than the viewport stick to its top left corner
+        self.rect.center = (round(position[0]), round(position[1]))
+        self.rect.right = min(self.rect.right, self.world_rect.right)
+        self.rect.bottom = min(self.rect.bottom, self.world_rect.bottom)
+        self.rect.left = max(self.rect.left, self.world_rect.left)
+        self.rect.top = max(self.rect.top, self.world_rect.top)
+
+    def is_in_world(self, position: pygame.Vector2 | tuple[float, float]) -> bool:
+        return self.world_rect.collidepoint(position)
+
+    def is_visible(self, rect: pygame.Rect) -> bool:
+        return self.rect.colliderect(rect)
+
+    def to_screen(
+        self, position: pygame.Vector2 | tuple[float, float]
+    ) -> pygame.Vector2:
+        return pygame.Vector2(position[0] - self.rect.left, position[1] - self.rect.top)
+
+    def to_world(
+        self, position: pygame.Vector2 | tuple[float, float]
+    ) -> pygame.Vector2:
+        return pygame.Vector2(position[0] + self.rect.left, position[1] + self.rect.top)
+
+    def rect_to_screen(self, rect: pygame.Rect) -> pygame.Rect:
+        return rect.move(-self.rect.left, -self.rect.top)
+
+    def visible_tiles(self) -> pygame.Rect:
+        # Tiles overlapping the viewport, in tile indices
+        tile_width, tile_height = tile_size()
+        first_i, first_j = self.rect.left // tile_width, self.rect.top // tile_height
+        last_i = math.ceil(self.rect.right / tile_width)
+        last_j = math.ceil(self.rect.bottom / tile_height)
+        return pygame.Rect(first_i, first_j, last_i - first_i, last_j - first_j)
+
+
+def viewport_size_in_tiles(
+    viewport_size: tuple[int, int] = (WINDOW_WIDTH, WINDOW_HEIGHT)
+) -> tuple[int, int]:
+    # Largest number of tiles a viewport can overlap, whatever its position
+    tile_width, tile_height = tile_size()
+    return (
+        math.ceil(viewport_size[0] / tile_width) + 1,
+        math.ceil(viewport_size[1] / tile_height) + 1,
+    )
@@ -0,0 +1,399 @@
+import enum
+import math
+import pygame
+import random
+
+from game import *
+from globals import *
+from grids import *
+
+
+class TileType(enum.Enum):
+    FLOOR = enum.auto()
+    WALL = enum.auto()
+    CLOSED_DOOR = enum.auto()
+    OPEN_DOOR = enum.auto()
+
+
+def game_object_type(tile: TileType) -> GameObjectType:
+    match tile:
+        case TileType.FLOOR:
+            return GameObjectType.FLOOR
+        case TileType.OPEN_DOOR:
+            return GameObjectType.OPEN_DOOR
+        case _:
+            return GameObjectType.OBSTACLE
+
+
+class TileSprite(enum.StrEnum):
+    WALL_PARAPET_TOP = "wall_parapet_top"
+    WALL_PARAPET_BOTTOM = "wall_parapet_bottom"
+    WALL_PARAPET_TOP_LEFT = "wall_parapet_top_left"
+    WALL_PARAPET_TOP_RIGHT = "wall_parapet_top_right"
+    WALL_PARAPET_BOTTOM_LEFT = "wall_parapet_bottom_left"
+    WALL_PARAPET_BOTTOM_RIGHT = "wall_parapet_bottom_right"
+    WALL_PARAPET_TOP_LEFT_CORNER = "wall_parapet_top_left_corner"
+    WALL_PARAPET_TOP_RIGHT_CORNER = "wall_parapet_top_right_corner"
+    WALL_PARAPET_BOTTOM_LEFT_CORNER = "wall_parapet_bottom_left_corner"
+    WALL_PARAPET_BOTTOM_RIGHT_CORNER = "wall_parapet_bottom_right_corner"
+    WALL_FRONT = "wall_front"
+    WALL_LEFT = "wall_left"
+    WALL_RIGHT = "wall_right"
+    FLOOR = "floor"
+    CORRIDOR_LEFT = "corridor_left"
+    CORRIDOR_RIGHT = "corridor_right"
+    DOOR_CLOSED_LEFT = "door_closed_left"
+    DOOR_CLOSED_RIGHT = "door_closed_right"
+    DOOR_OPEN_LEFT = "door_open_left"
+    DOOR_OPEN_RIGHT = "door_open_right"
+    # Solid rock away from any room, left to the background
+    EMPTY = "empty"
+
+
+# Bits of the autotiling bitmask, one per neighbour of a tile
+NORTH, EAST, SOUTH, WEST, NORTH_EAST, SOUTH_EAST, SOUTH_WEST, NORTH_WEST = (
+    1 << bit for bit in range(8)
+)
+AUTOTILE_NEIGHBOUR_OFFSETS = (
+    (0, -1),
+    (1, 0),
+    (0, 1),
+    (-1, 0),
+    (1, -1),
+    (1, 1),
+    (-1, 1),
+    (-1, -1),
+)
+
+
+def autotile_sprite(neighbours: int) -> TileSprite:
+    # Sprite of a wall from the inside of rooms around it. The inside is the floor
+    # plus the front faces of the walls right above the floor.
+    if neighbours == 0xFF:
+        return TileSprite.WALL_FRONT
+
+    if neighbours & SOUTH:
+        if neighbours & EAST:
+            return TileSprite.WALL_PARAPET_BOTTOM_RIGHT
+        if neighbours & WEST:
+            return TileSprite.WALL_PARAPET_BOTTOM_LEFT
+        return TileSprite.WALL_PARAPET_BOTTOM
+    if neighbours & NORTH:
+        if neighbours & EAST:
+            return TileSprite.WALL_PARAPET_TOP_RIGHT
+        if neighbours & WEST:
+            return TileSprite.WALL_PARAPET_TOP_LEFT
+        return TileSprite.WALL_PARAPET_TOP
+    if neighbours & EAST:
+        return TileSprite.WALL_LEFT
+    if neighbours & WEST:
+        return TileSprite.WALL_RIGHT
+
+    if neighbours & SOUTH_EAST:
+        return TileSprite.WALL_PARAPET_BOTTOM_RIGHT_CORNER
+    if neighbours & SOUTH_WEST:
+        return TileSprite.WALL_PARAPET_BOTTOM_LEFT_CORNER
+    if neighbours & NORTH_EAST:
+        return TileSprite.WALL_PARAPET_TOP_RIGHT_CORNER
+    if neighbours & NORTH_WEST:
+        return TileSprite.WALL_PARAPET_TOP_LEFT_CORNER
+    return TileSprite.EMPTY
+
+
+# Codes of a TileGrid of TileSprite, by neighbours bitmask
+AUTOTILE_TABLE = bytes(
+    list(TileSprite).index(autotile_sprite(neighbours)) for neighbours in range(256)
+)
+
+
+def autotile(
+    room_map: TileGrid[TileType],
+    tile_map: TileGrid[TileSprite],
+    rect: pygame.Rect | tuple[int, int, int, int],
+) -> None:
+    # Picks the sprites of the tiles in rect from the floor around them. Rows of tiles
+    # are handled as big integers with one byte per tile, so that finding neighbours
+    # is a shift and combining them is an or, for all tiles at once.
+    rect = pygame.Rect(rect).clip(0, 0, room_map.width, room_map.height)
+    if not rect.width or not rect.height:
+        return
+
+    # Neighbours of the tiles on the border are needed too, as well as one more row
+    # below, since the front face of a wall depends on the tile below it
+    window = pygame.Rect(rect.left - 1, rect.top - 1, rect.width + 2, rect.height + 3)
+    size = window.width * window.height
+    all_tiles = (1 << (8 * size)) - 1
+
+    floor = int.from_bytes(room_map.mask_rect(window, TileType.FLOOR), "little")
+    inside = floor | (floor >> (8 * window.width))
+
+    neighbours = inside * 0xFF
+    for bit, (offset_i, offset_j) in enumerate(AUTOTILE_NEIGHBOUR_OFFSETS):
+        offset = offset_j * window.width + offset_i
+        if offset > 0:
+            shifted_inside = inside >> (8 * offset)
+        else:
+            shifted_inside = (inside << (-8 * offset)) & all_tiles
+        neighbours |= shifted_inside << bit
+
+    sprites = int.from_bytes(
+        neighbours.to_bytes(size, "little").translate(AUTOTILE_TABLE), "little"
+    )
+    # The floor is inside as well, so it was given the front face of walls so far
+    sprites ^= floor * (
+        tile_map.codes[TileSprite.WALL_FRONT] ^ tile_map.codes[TileSprite.FLOOR]
+    )
+    sprite_codes = sprites.to_bytes(size, "little")
+
+    for j in range(rect.top, rect.bottom):
+        start = j * tile_map.width + rect.left
+        window_start = (j - window.top) * window.width + 1
+        tile_map.cells[start : start + rect.width] = sprite_codes[
+            window_start : window_start + rect.width
+        ]
+
+
+class DungeonGenerator:
+    # Carves rooms and corridors into a map of walls, one chunk of tiles at a time.
+    # Chunks only depend on the seed and on their position, and corridors cross from
+    # one chunk to the next at places both chunks agree on, so chunks can be carved in
+    # any order and only once needed. Maps fitting in a single chunk hold one big room.
+
+    def __init__(
+        self,
+        seed: int,
+        map_size_in_tiles: tuple[int, int],
+        chunk_size_in_tiles: int = DUNGEON_CHUNK_SIZE_IN_TILES,
+    ) -> None:
+        self.seed = seed
+        self.map_rect = pygame.Rect((0, 0), map_size_in_tiles)
+        self.chunk_size = chunk_size_in_tiles
+        self.num_chunks = (
+            math.ceil(self.map_rect.width / self.chunk_size),
+            math.ceil(self.map_rect.height / self.chunk_size),
+        )
+        self.total_num_chunks = self.num_chunks[0] * self.num_chunks[1]
+        self.is_single_room = self.total_num_chunks == 1
+
+        self.room_rects: dict[tuple[int, int], pygame.Rect | None] = {}
+        self.spawn_chunk_idx = self.__find_spawn_chunk()
+
+    def chunk_idx(self, tile_idx: pygame.Vector2 | tuple[int, int]) -> tuple[int, int]:
+        return (
+            int(tile_idx[0]) // self.chunk_size,
+            int(tile_idx[1]) // self.chunk_size,
+        )
+
+    def chunk_rect(self, chunk_idx: tuple[int, int]) -> pygame.Rect:
+        return pygame.Rect(
+            chunk_idx[0] * self.chunk_size,
+            chunk_idx[1] * self.chunk_size,
+            self.chunk_size,
+            self.chunk_size,
+        ).clip(self.map_rect)
+
+    def is_valid_chunk(self, chunk_idx: tuple[int, int]) -> bool:
+        return (
+            0 <= chunk_idx[0] < self.num_chunks[0]
+            and 0 <= chunk_idx[1] < self.num_chunks[1]
+        )
+
+    def chunks_around(
+        self, tile_idx: pygame.Vector2 | tuple[int, int], radius: int
+    ) -> list[tuple[int, int]]:
+        # Closest chunks first
+        center_i, center_j = self.chunk_idx(tile_idx)
+        chunk_idxs = [
+            (i, j)
+            for j in range(center_j - radius, center_j + radius + 1)
+            for i in range(center_i - radius, center_i + radius + 1)
+            if self.is_valid_chunk((i, j))
+        ]
+        chunk_idxs.sort(
+            key=lambda idx: max(abs(idx[0] - center_i), abs(idx[1] - center_j))
+        )
+        return chunk_idxs
+
+    def all_chunks(self) -> list[tuple[int, int]]:
+        return [
+            (i, j) for j in range(self.num_chunks[1]) for i in range(self.num_chunks[0])
+        ]
+
+    def spawn_tile_idx(self) -> tuple[int, int]:
+        if self.is_single_room:
+            return self.map_rect.width // 2, self.map_rect.height // 2
+
+        room_rect = self.room_rect(self.spawn_chunk_idx)
+        return room_rect.center if room_rect else self.map_rect.center
+
+    def entrance_tile_idx(self) -> tuple[int, int]:
+        # The single room is entered through the gap in its bottom wall
+        if self.is_single_room:
+            return self.map_rect.width // 2, self.map_rect.height - 1
+        return self.spawn_tile_idx()
+
+    def room_rect(self, chunk_idx: tuple[int, int]) -> pygame.Rect | None:
+        if chunk_idx not in self.room_rects:
+            self.room_rects[chunk_idx] = self.__generate_room_rect(chunk_idx)
+        return self.room_rects[chunk_idx]
+
+    def generate_chunk(
+        self, room_map: TileGrid[TileType], chunk_idx: tuple[int, int]
+    ) -> list[tuple[int, int]]:
+        # Carves the floor of the chunk and returns the left tiles of its exits, which
+        # are two tiles wide
+        if self.is_single_room:
+            return self.__generate_single_room(room_map)
+
+        room_rect = self.room_rect(chunk_idx)
+        if not room_rect:
+            return []
+        room_map.fill_rect(room_rect, TileType.FLOOR)
+
+        chunk_i, chunk_j = chunk_idx
+        for neighbour_idx, edge_idx, is_horizontal in (
+            ((chunk_i + 1, chunk_j), chunk_idx, True),
+            ((chunk_i - 1, chunk_j), (chunk_i - 1, chunk_j), True),
+            ((chunk_i, chunk_j + 1), chunk_idx, False),
+            ((chunk_i, chunk_j - 1), (chunk_i, chunk_j - 1), False),
+        ):
+            if crossing := self.__corridor_crossing(
+                edge_idx, neighbour_idx, is_horizontal
+            ):
+                self.__carve_corridor(room_map, chunk_idx, room_rect, crossing)
+
+        rng = self.__chunk_random(chunk_idx, "exit")
+        exits = []
+        if chunk_idx == self.spawn_chunk_idx or rng.random() < DUNGEON_EXIT_PROBABILITY:
+            if exit_tile_idx := self.__find_exit(room_map, room_rect, rng):
+                exits.append(exit_tile_idx)
+        return exits
+
+    def __generate_single_room(
+        self, room_map: TileGrid[TileType]
+    ) -> list[tuple[int, int]]:
+        last_i, last_j = self.map_rect.width - 1, self.map_rect.height - 1
+        room_map.fill_rect((1, 2, last_i - 1, last_j - 2), TileType.FLOOR)
+
+        # Exits: doors in the top wall and a gap in the bottom wall
+        horizontal_exit_left_i = self.map_rect.width // 2 - 1
+        room_map.fill_rect((horizontal_exit_left_i, last_j, 2, 1), TileType.FLOOR)
+        return [(horizontal_exit_left_i, 1)]
+
+    def __chunk_random(self, chunk_idx: tuple[int, int], purpose: str) -> random.Random:
+        # Seeding with a string is stable across runs, unlike hashing a tuple
+        return random.Random(f"{self.seed}:{purpose}:{chunk_idx[0]}:{chunk_idx[1]}")
+
+    def __generate_room_rect(self, chunk_idx: tuple[int, int]) -> pygame.Rect | None:
+        if not self.is_valid_chunk(chunk_idx):
+            return None
+
+        # One wall tile around rooms, and two above for the front faces of the walls
+        chunk_rect = self.chunk_rect(chunk_idx)
+        max_width, max_height = chunk_rect.width - 2, chunk_rect.height - 3
+        min_width, min_height = DUNGEON_MIN_ROOM_SIZE_IN_TILES
+        if max_width < min_width or max_height < min_height:
+            return None
+
+        rng = self.__chunk_random(chunk_idx, "room")
+        width = rng.randint(min_width, max_width)
+        height = rng.randint(min_height, max_height)
+        return pygame.Rect(
+            rng.randint(chunk_rect.left + 1, chunk_rect.right - 1 - width),
+            rng.randint(chunk_rect.top + 2, chunk_rect.bottom - 1 - height),
+            width,
+            height,
+        )
+
+    def __find_spawn_chunk(self) -> tuple[int, int]:
+        center_idx = (self.num_chunks[0] // 2, self.num_chunks[1] // 2)
+        if self.is_single_room:
+            return center_idx
+
+        chunk_idxs = sorted(
+            self.all_chunks(),
+            key=lambda idx: abs(idx[0] - center_idx[0]) + abs(idx[1] - center_idx[1]),
+        )
+        for chunk_idx in chunk_idxs:
+            if self.room_rect(chunk_idx):
+                return chunk_idx
+        return center_idx
+
+    def __corridor_crossing(
+        self,
+        edge_idx: tuple[int, int],
+        neighbour_idx: tuple[int, int],
+        is_horizontal: bool,
+    ) -> tuple[int, int] | None:
+        # Tile where the corridor between two chunks crosses the right or bottom edge
+        # of the chunk edge_idx, the same for both chunks
+        if not self.room_rect(edge_idx) or not self.room_rect(neighbour_idx):
+            return None
+
+        rng = self.__chunk_random(edge_idx, "east" if is_horizontal else "south")
+        edge_rect = self.chunk_rect(edge_idx)
+        if is_horizontal:
+            other_rect = self.chunk_rect((edge_idx[0] + 1, edge_idx[1]))
+            last_j = (
+                min(edge_rect.bottom, other_rect.bottom) - 1 - DUNGEON_CORRIDOR_WIDTH
+            )
+            if last_j < edge_rect.top + 2:
+                return None
+            return edge_rect.right, rng.randint(edge_rect.top + 2, last_j)
+
+        other_rect = self.chunk_rect((edge_idx[0], edge_idx[1] + 1))
+        last_i = min(edge_rect.right, other_rect.right) - 1 - DUNGEON_CORRIDOR_WIDTH
+        if last_i < edge_rect.left + 1:
+            return None
+        return rng.randint(edge_rect.left + 1, last_i), edge_rect.bottom
+
+    def __carve_corridor(
+        self,
+        room_map: TileGrid[TileType],
+        chunk_idx: tuple[int, int],
+        room_rect: pygame.Rect,
+        crossing: tuple[int, int],
+    ) -> None:
+        # From the edge of the chunk straight to the middle of the room, then turning
+        # towards it. Only the part of the corridor inside the chunk is carved.
+        chunk_rect = self.chunk_rect(chunk_idx)
+        crossing_i, crossing_j = crossing
+        room_i, room_j = room_rect.center
+        width = DUNGEON_CORRIDOR_WIDTH
+
+        if crossing_i in (chunk_rect.left, chunk_rect.right):
+            edge_i = (
+                chunk_rect.left if crossing_i == chunk_rect.left else crossing_i - 1
+            )
+            straight_rect = pygame.Rect(
+                min(edge_i, room_i), crossing_j, abs(edge_i - room_i) + width, width
+            )
+            turning_rect = pygame.Rect(
+                room_i, min(crossing_j, room_j), width, abs(crossing_j - room_j) + width
+            )
+        else:
+            edge_j = chunk_rect.top if crossing_j == chunk_rect.top else crossing_j - 1
+            straight_rect = pygame.Rect(
+                crossing_i, min(edge_j, room_j), width, abs(edge_j - room_j) + width
+            )
+            turning_rect = pygame.Rect(
+                min(crossing_i, room_i), room_j, abs(crossing_i - room_i) + width, width
+            )
+
+        room_map.fill_rect(straight_rect.clip(chunk_rect), TileType.FLOOR)
+        room_map.fill_rect(turning_rect.clip(chunk_rect), TileType.FLOOR)
+
+    def __find_exit(
+        self, room_map: TileGrid[TileType], room_rect: pygame.Rect, rng: random.Random
+    ) -> tuple[int, int] | None:
+        # Doors go in the front face of the wall above the room
+        exit_j = room_rect.top - 1
+        exit_is = list(range(room_rect.left, room_rect.right - 1))
+        rng.shuffle(exit_is)
+        for exit_i in exit_is:
+            if (
+                room_map[exit_i, exit_j] == TileType.WALL
+                and room_map[exit_i + 1, exit_j] == TileType.WALL
+            ):
+                return exit_i, exit_j
+        return None
@@ -1,60 +1,181 @@
+import os
 import pygame
 import random
 import time
 import typing
 
 from actors import *
+from audio import *
 from game import *
 from globals import *
+from prefetch import *
+from profiler import *
+from replay import *
 from rooms import *
 from utils import *
 
+InputScript = typing.Callable[["Engine"], list[pygame.event.Event]]
+
 
 class Engine:
-    def __init__(self) -> None:
-        self.time_delta_in_secs = 0.0
+    def __init__(
+        self,
+        headless: bool = False,
+        render: bool | None = None,
+        input_script: InputScript | None = None,
+        seed: int | None = None,
+        record_path: Path | str | None = None,
+        replay: Replay | None = None,
+        map_size_in_tiles: tuple[int, int] | None = None,
+    ) -> None:
+        # Headless engines run without window nor sound, with a fixed time step and
+        # as fast as possible. Rendering happens off-screen only if requested.
+        self.headless = headless
+        self.render_enabled = not headless if render is None else render
+        self.input_script = input_script
+
+        # Replays bring their own seed and replace any live input but quitting
+        self.replay = replay
+        if replay is not None:
+            seed = replay.seed
+        self.seed = random.getrandbits(32) if seed is None else seed
+        self.record_path = record_path
+        self.recording = Replay(self.seed) if record_path else None
+
+        # Maps larger than the window scroll with the hero
+        self.map_size_in_tiles = map_size_in_tiles or window_size_in_tiles()
+
+        # Rooms are always updated with the same time step, independently of the frame
+        # rate. Frame time is accumulated and consumed in steps of that size.
+        self.time_delta_in_secs = SIM_TIME_STEP_IN_SECS
+        self.frame_time_in_secs = 0.0
+        self.time_accumulator_in_secs = 0.0
         self.current_time_in_secs = 0.0
         self.previous_time_in_secs = 0.0
+        self.num_frames = 0
+        self.num_sim_steps = 0
         self.running = False
+        self.initialized = False
 
     def __enter__(self) -> typing.Self:
+        if self.headless:
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
+            os.environ["SDL_AUDIODRIVER"] = "dummy"
+
         pygame.init()
         pygame.mixer.init()
+        audio.init()
 
         self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
         self.clock = pygame.time.Clock()
         pygame.display.set_caption("Random Dungeon")
 
-        self.game = Game(window_size_in_tiles())
+        # Decode all sprites upfront, so that spawns and room transitions do not hit the disk
+        tile_cache.preload(PRELOAD_TILE_FILE_IDXS)
+        fireball_pool.preallocate()
+
+        self.game = Game(self.map_size_in_tiles, self.seed)
         self.room: Room | None = None
 
+        self.room_prefetcher: Prefetcher[MonsterRoom] = Prefetcher(ROOM_PREFETCH)
+        self.next_room_seed: int | None = None
+
+        self.previous_time_in_secs = time.perf_counter()
         self.initialized = True
         return self
 
     def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.room_prefetcher.shutdown()
+        profiler.finish_capture()
+        allocation_profiler.finish_capture()
+
+        if self.recording is not None and self.record_path:
+            self.recording.num_sim_steps = self.num_sim_steps
+            self.recording.save(self.record_path)
+
+        fireball_pool.clear()
+        tile_cache.clear()
+        text_cache.clear()
+        audio.clear()
         pygame.mixer.quit()
         pygame.quit()
 
-    def run(self) -> None:
+    def run(self, max_frames: int | None = None) -> None:
         if not self.initialized:
             raise RuntimeError("Engine not initialized")
 
-        self.previous_time_in_secs = time.time()
+        self.previous_time_in_secs = time.perf_counter()
         self.running = True
         while self.running:
+            self.step()
+            if max_frames is not None and self.num_frames >= max_frames:
+                self.running = False
+            if self.replay is not None and self.replay.is_finished(self.num_sim_steps):
+                self.running = False
+
+    def step(self) -> None:
+        profiler.begin_frame()
+        allocation_profiler.begin_frame()
+        self.__update_time()
+        with profiler.phase("read_events"):
             self.__read_events()
-            self.__update()
-            self.__animate()
-            self.__render()
-            self.__update_time()
-            self.clock.tick(FPS)
+
+        self.time_accumulator_in_secs += self.frame_time_in_secs
+        num_sim_steps = 0
+        while self.time_accumulator_in_secs >= SIM_TIME_STEP_IN_SECS:
+            if num_sim_steps == SIM_MAX_STEPS_PER_FRAME:
+                # Give up on catching up, or slow frames would only get slower
+                self.time_accumulator_in_secs = 0.0
+                break
+
+            if self.replay is not None:
+                # Recorded events go right before the step they were read before, as
+                # frames of the replay need not run as many steps as when recording
+                self.__dispatch_events(self.replay.events_at(self.num_sim_steps))
+            with profiler.phase("update"):
+                self.__update()
+            with profiler.phase("animate"):
+                self.__animate()
+            self.time_accumulator_in_secs -= SIM_TIME_STEP_IN_SECS
+            num_sim_steps += 1
+            self.num_sim_steps += 1
+
+        if self.render_enabled:
+            # Render between the last two simulation steps, by the time left over
+            with profiler.phase("render"):
+                self.__render(self.time_accumulator_in_secs / SIM_TIME_STEP_IN_SECS)
+
+        if not self.headless:
+            with profiler.phase("tick"):
+                self.clock.tick(FPS)
+        self.num_frames += 1
+        allocation_profiler.end_frame()
+        profiler.end_frame()
 
     def __read_events(self) -> None:
         events = pygame.event.get()
+        if self.replay is not None:
+            events = [event for event in events if event.type == pygame.QUIT]
+        elif self.input_script:
+            events += self.input_script(self)
+
+        # Events are keyed by simulation step, which unlike frames are the same in
+        # every run of the same session
+        if self.recording is not None:
+            self.recording.record(self.num_sim_steps, events)
 
+        self.__dispatch_events(events)
+
+    def __dispatch_events(self, events: list[pygame.event.Event]) -> None:
         for event in events:
             if event.type == pygame.QUIT:  # closing window
                 self.running = False
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F9:
+                profiler.capture(PROFILER_CAPTURE_FRAMES, PROFILER_TRACE_PATH)
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F10:
+                allocation_profiler.capture(
+                    PROFILER_ALLOCATION_FRAMES, PROFILER_ALLOCATION_REPORT_PATH
+                )
 
         if self.room:
             self.room.read_events(events)
@@ -71,31 +192,36 @@ class Engine:
                     self.room.update(self.time_delta_in_secs)
 
             case GameState.START_PLAY:
+                self.room_prefetcher.cancel()
+                self.next_room_seed = None
                 self.game.level = 1
                 self.game.hero_life_points = 3
                 self.room = MonsterRoom(self.game, self.game.level)
                 self.room.hero.current_tile_idx = pygame.Vector2(
-                    window_size_in_tiles()[0] // 2, window_size_in_tiles()[1] // 2
+                    self.room.spawn_tile_idx
                 )
                 self.room.enter()
+                audio.play_music()
                 self.game.state = GameState.PLAY
 
             case GameState.PLAY if isinstance(self.room, MonsterRoom):
-                self.game.background_music.play(-1, 0, 5000)
-                self.game.background_music.set_volume(0.2)
                 self.room.update(self.time_delta_in_secs)
 
                 if self.game.hero_life_points == 0:
                     self.game.state = GameState.DISPLAY_GAME_OVER
 
-                if not self.room.monsters and (
-                    self.room.hero.current_tile_idx == self.game.door_left_tile_idx
-                    or self.room.hero.current_tile_idx == self.game.door_right_tile_idx
+                if not self.room.monsters:
+                    self.__prefetch_next_room()
+
+                if not self.room.monsters and self.room.is_door_tile(
+                    self.room.hero.current_tile_idx
                 ):
                     self.__move_to_next_room()
 
             case GameState.DISPLAY_GAME_OVER:
-                self.game.background_music.stop()
+                audio.stop_music()
+                if self.room:
+                    self.room.exit()
                 self.room = MenuRoom(self.game, render_achievements=True)
                 self.room.enter()
                 self.game.state = GameState.DISPLAY_MENU
@@ -103,13 +229,30 @@ class Engine:
             case _:
                 raise ValueError(f"Invalid game state: {self.game.state}")
 
+    def __next_room_factory(
+        self,
+    ) -> tuple[tuple[int, int], typing.Callable[[], MonsterRoom]]:
+        # The seed is drawn on the main thread, so the next room is the same whether it
+        # was prefetched or not
+        if self.next_room_seed is None:
+            self.next_room_seed = self.game.random.getrandbits(64)
+
+        level, seed = self.game.level + 1, self.next_room_seed
+        return (level, seed), lambda: MonsterRoom(self.game, level, seed)
+
+    def __prefetch_next_room(self) -> None:
+        self.room_prefetcher.prefetch(*self.__next_room_factory())
+
     def __move_to_next_room(self) -> None:
         if self.room:
             self.room.exit()
 
+            self.room = self.room_prefetcher.take(*self.__next_room_factory())
+            self.next_room_seed = None
             self.game.level += 1
-            self.room = MonsterRoom(self.game, self.game.level)
-            self.room.hero.current_tile_idx = pygame.Vector2(8.0, 11.0)
+            self.room.hero.current_tile_idx = pygame.Vector2(
+                self.room.entrance_tile_idx
+            )
 
             self.room.enter()
 
@@ -117,9 +260,10 @@ class Engine:
         if self.room:
             self.room.animate(self.time_delta_in_secs)
 
-    def __render(self) -> None:
+    def __render(self, interpolation: float) -> None:
+        dirty_rects = None
         if self.room:
-            self.room.render()
+            dirty_rects = self.room.render(interpolation)
 
         if DEBUG_RENDER_GAME_MAP:
             self.game.render_map()
@@ -127,11 +271,29 @@ class Engine:
         if DEBUG_RENDER_STATS:
             self.__render_stats()
 
-        pygame.display.flip()
+        with profiler.phase("present"):
+            if dirty_rects is None or DEBUG_RENDER_GAME_MAP or DEBUG_RENDER_STATS:
+                pygame.display.flip()
+            else:
+                pygame.display.update(dirty_rects)
 
     def __render_stats(self) -> None:
         x_pos, y_pos = 10, 10
         debug(f"FPS: {round(self.clock.get_fps(), 1)}", (x_pos, y_pos))
+        debug(
+            f"Tile cache: {tile_cache.hits} hits, {tile_cache.misses} misses",
+            (x_pos, y_pos := y_pos + 20),
+        )
+        debug(f"Text cache: {text_cache.stats()}", (x_pos, y_pos := y_pos + 20))
+        if isinstance(self.room, MonsterRoom):
+            debug(f"Lasers: {self.room.lasers.stats()}", (x_pos, y_pos := y_pos + 20))
+            debug(f"AI: {self.room.ai_scheduler.stats()}", (x_pos, y_pos := y_pos + 20))
+        debug(f"Fireballs: {fireball_pool.stats()}", (x_pos, y_pos := y_pos + 20))
+        debug(
+            f"Room prefetch: {self.room_prefetcher.stats()}",
+            (x_pos, y_pos := y_pos + 20),
+        )
+        debug(f"Effects: {audio.stats()}", (x_pos, y_pos := y_pos + 20))
 
         if self.game.state == GameState.PLAY and isinstance(self.room, DungeonRoom):
             debug(
@@ -139,7 +301,32 @@ class Engine:
                 (x_pos, y_pos := y_pos + 20),
             )
 
+        frame_percentiles = profiler.percentiles()
+        debug(
+            f"Frame ms p50/p95/p99: {frame_percentiles['p50']:.1f}"
+            f" / {frame_percentiles['p95']:.1f} / {frame_percentiles['p99']:.1f}",
+            (x_pos, y_pos := y_pos + 20),
+        )
+        for phase_name, phase_times_in_ms in profiler.phase_times_in_ms.items():
+            phase_percentiles = profiler.percentiles(phase_times_in_ms)
+            debug(
+                f"{phase_name}: {phase_percentiles['p50']:.2f}"
+                f" / {phase_percentiles['p95']:.2f} ms",
+                (x_pos, y_pos := y_pos + 20),
+            )
+
+        profiler.render_graph(
+            pygame.display.get_surface(),
+            pygame.Rect(WINDOW_WIDTH - 250, WINDOW_HEIGHT - 90, 240, 80),
+        )
+
     def __update_time(self) -> None:
-        self.current_time_in_secs = time.time()
-        self.time_delta_in_secs = self.current_time_in_secs - self.previous_time_in_secs
+        if self.headless:
+            # Exactly one simulation step per frame
+            self.frame_time_in_secs = SIM_TIME_STEP_IN_SECS
+            self.current_time_in_secs += self.frame_time_in_secs
+            return
+
+        self.current_time_in_secs = time.perf_counter()
+        self.frame_time_in_secs = self.current_time_in_secs - self.previous_time_in_secs
         self.previous_time_in_secs = self.current_time_in_secs
@@ -0,0 +1,385 @@
+import array
+import enum
+import math
+import pygame
+import typing
+
+from actors import *
+from globals import *
+from grids import *
+from raycast import *
+from spatial import *
+from utils import *
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+V = typing.TypeVar("V")
+
+
+class EntityStore(typing.Generic[V]):
+    # Entities moving in straight lines, stored as a structure of arrays instead of one
+    # object each, with objects as thin views onto their slot. Arrays are plain
+    # arrays, walked in loops while the store holds few entities. Once it holds at
+    # least numpy_min_size of them, moving all of them or testing all of them against
+    # a rect is a few numpy operations on the same memory per tick. Coordinates are
+    # interleaved: x at 2 * i, y at 2 * i + 1.
+
+    def __init__(
+        self,
+        capacity: int,
+        collision_size: tuple[int, int],
+        numpy_min_size: int | None = ENTITY_STORE_NUMPY_MIN_SIZE,
+    ) -> None:
+        self.capacity = capacity
+        self.collision_size = collision_size
+        # Never vectorized without numpy, or when None
+        self.numpy_min_size = numpy_min_size if numpy is not None else None
+
+        self.size = 0
+        self.positions = self._zeros(2 * capacity)
+        self.previous_positions = self._zeros(2 * capacity)
+        self.directions = self._zeros(2 * capacity)
+        self.speeds = self._zeros(capacity)
+
+        self.views: list[V] = []
+
+        # Broad phase for collisions and culling, rebuilt when queried after entities
+        # moved, were added or removed
+        self.spatial_hash = SpatialHash(tile_size())
+        self.is_spatial_hash_dirty = True
+
+        self.peak_size = 0
+        self.num_rejected = 0
+
+    def _zeros(self, length: int, typecode: str = "d") -> array.array:
+        return array.array(typecode, [0]) * length
+
+    def _is_vectorized(self) -> bool:
+        return self.numpy_min_size is not None and self.size >= self.numpy_min_size
+
+    @staticmethod
+    def _numpy(values: array.array):
+        # Shares the memory of the array, which is never resized
+        return numpy.frombuffer(values, dtype=values.typecode)
+
+    def _coordinate_arrays(self) -> list:
+        return [self.positions, self.previous_positions, self.directions]
+
+    def _value_arrays(self) -> list:
+        return [self.speeds]
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self) -> typing.Iterator[V]:
+        return iter(self.views[: self.size])
+
+    def __getitem__(self, idx: int) -> V:
+        if not 0 <= idx < self.size:
+            raise IndexError(idx)
+        return self.views[idx]
+
+    def _add_slot(
+        self,
+        position: pygame.Vector2 | tuple[float, float],
+        direction: pygame.Vector2 | tuple[float, float],
+        speed: float,
+    ) -> int | None:
+        if self.size == self.capacity:
+            self.num_rejected += 1
+            return None
+
+        idx = self.size
+        self.positions[2 * idx] = self.previous_positions[2 * idx] = position[0]
+        self.positions[2 * idx + 1] = self.previous_positions[2 * idx + 1] = position[1]
+        self.directions[2 * idx] = direction[0]
+        self.directions[2 * idx + 1] = direction[1]
+        self.speeds[idx] = speed
+        self.size += 1
+        if not self.is_spatial_hash_dirty:
+            self.spatial_hash.insert(idx, position[0], position[1])
+        self.peak_size = max(self.peak_size, self.size)
+        return idx
+
+    # Components of positions, read without allocating vectors in every step
+
+    def position_xy(self, idx: int) -> tuple[float, float]:
+        return self.positions[2 * idx], self.positions[2 * idx + 1]
+
+    def interpolated_position_xy(
+        self, idx: int, interpolation: float
+    ) -> tuple[float, float]:
+        x, y = self.positions[2 * idx], self.positions[2 * idx + 1]
+        if interpolation >= 1.0:
+            return x, y
+        previous_x = self.previous_positions[2 * idx]
+        previous_y = self.previous_positions[2 * idx + 1]
+        return (
+            previous_x + (x - previous_x) * interpolation,
+            previous_y + (y - previous_y) * interpolation,
+        )
+
+    def move(self, idx: int, position: pygame.Vector2 | tuple[float, float]) -> None:
+        cell_idx = self.spatial_hash.cell_idx(
+            self.positions[2 * idx], self.positions[2 * idx + 1]
+        )
+        self.positions[2 * idx] = position[0]
+        self.positions[2 * idx + 1] = position[1]
+        if self.spatial_hash.cell_idx(position[0], position[1]) != cell_idx:
+            self.is_spatial_hash_dirty = True
+
+    def animate(self, time_delta_in_secs: float) -> None:
+        self.is_spatial_hash_dirty = True
+        length = 2 * self.size
+        self.previous_positions[:length] = self.positions[:length]
+        if self._is_vectorized():
+            self._numpy(self.positions)[:length] += (
+                self._numpy(self.directions)[:length]
+                * numpy.repeat(self._numpy(self.speeds)[: self.size], 2)
+                * time_delta_in_secs
+            )
+            return
+
+        positions, directions, speeds = self.positions, self.directions, self.speeds
+        for coord_idx in range(length):
+            positions[coord_idx] += (
+                directions[coord_idx] * speeds[coord_idx >> 1] * time_delta_in_secs
+            )
+
+    def update_spatial_hash(self) -> None:
+        if self.is_spatial_hash_dirty:
+            self.spatial_hash.rebuild(self.positions, self.size, self._is_vectorized())
+            self.is_spatial_hash_dirty = False
+
+    def colliding(self, rect: pygame.Rect, margin: float = 0.0) -> list[int]:
+        # Slots whose collision box, grown by the margin, overlaps the rect
+        half_width = self.collision_size[0] / 2 + margin
+        half_height = self.collision_size[1] / 2 + margin
+        left, right = rect.left - half_width, rect.right + half_width
+        top, bottom = rect.top - half_height, rect.bottom + half_height
+
+        self.update_spatial_hash()
+        candidate_idxs = self.spatial_hash.query(left, top, right, bottom)
+
+        if self.spatial_hash.sorted_slots is not None:
+            positions = self._numpy(self.positions)
+            xs = positions[2 * candidate_idxs]
+            ys = positions[2 * candidate_idxs + 1]
+            overlaps = (left < xs) & (xs < right) & (top < ys) & (ys < bottom)
+            return candidate_idxs[overlaps].tolist()
+
+        positions = self.positions
+        return [
+            idx
+            for idx in candidate_idxs
+            if left < positions[2 * idx] < right
+            and top < positions[2 * idx + 1] < bottom
+        ]
+
+    def query(self, rect: pygame.Rect) -> list[V]:
+        # Entities whose sprite may overlap the rect, e.g. the viewport
+        return [self.views[idx] for idx in self.colliding(rect, margin=TILE_RADIUS * 2)]
+
+    def remove(self, idxs: typing.Collection[int]) -> None:
+        # Keeps the remaining slots in order, so that updates stay deterministic
+        if not idxs:
+            return
+
+        if self._is_vectorized():
+            keep = numpy.ones(self.size, dtype=bool)
+            keep[list(idxs)] = False
+            kept_idxs = numpy.flatnonzero(keep)
+            coord_kept = numpy.stack((2 * kept_idxs, 2 * kept_idxs + 1), axis=1).ravel()
+            for coords in map(self._numpy, self._coordinate_arrays()):
+                coords[: len(coord_kept)] = coords[coord_kept]
+            for values in map(self._numpy, self._value_arrays()):
+                values[: len(kept_idxs)] = values[kept_idxs]
+        else:
+            removed = set(idxs)
+            kept_idxs = [idx for idx in range(self.size) if idx not in removed]
+            coordinate_arrays = self._coordinate_arrays()
+            value_arrays = self._value_arrays()
+            for new_idx, idx in enumerate(kept_idxs):
+                if new_idx == idx:
+                    continue
+                for coords in coordinate_arrays:
+                    coords[2 * new_idx] = coords[2 * idx]
+                    coords[2 * new_idx + 1] = coords[2 * idx + 1]
+                for values in value_arrays:
+                    values[new_idx] = values[idx]
+
+        self.size = len(kept_idxs)
+        self.is_spatial_hash_dirty = True
+        self._on_removed(kept_idxs)
+
+    def _on_removed(self, kept_idxs: typing.Sequence[int]) -> None:
+        pass
+
+    def clear(self) -> None:
+        self.size = 0
+        self.is_spatial_hash_dirty = True
+
+    def stats(self) -> str:
+        backend = "numpy" if self._is_vectorized() else "arrays"
+        return (
+            f"{self.size}/{self.capacity} in use, peak {self.peak_size}, "
+            f"rejected {self.num_rejected}, {backend}"
+        )
+
+
+class ProjectileStore(EntityStore[Laser]):
+    # Projectiles all flying at the same speed. Their views are created once per slot
+    # and never move, so a view is only valid until projectiles before it are removed.
+
+    def __init__(
+        self,
+        capacity: int,
+        speed: float,
+        collision_size: tuple[int, int],
+        numpy_min_size: int | None = ENTITY_STORE_NUMPY_MIN_SIZE,
+    ) -> None:
+        super().__init__(capacity, collision_size, numpy_min_size)
+        self.speed = speed
+        self.angles = self._zeros(capacity)
+
+    def _value_arrays(self) -> list:
+        return super()._value_arrays() + [self.angles]
+
+    def add(
+        self, position: pygame.Vector2, direction: pygame.Vector2, angle: float
+    ) -> Laser | None:
+        idx = self._add_slot(position, direction, self.speed)
+        if idx is None:
+            return None
+
+        self.angles[idx] = angle
+        while len(self.views) < self.size:
+            self.views.append(Laser(self, len(self.views)))
+        return self.views[idx]
+
+    def blocked(self, grid: TileGrid, *values: enum.Enum) -> list[int]:
+        # Slots out of the grid, over one of the given tiles, or which went through one
+        # of them since the previous step. Only the few projectiles which changed tiles
+        # need to be swept along their path.
+        blocked_idxs = self.__blocked_at_position(grid, *values)
+        blocked_idx_set = set(blocked_idxs)
+        for idx in self.__changed_tiles():
+            if idx not in blocked_idx_set and cast_ray(
+                grid,
+                self.previous_positions[2 * idx : 2 * idx + 2],
+                self.positions[2 * idx : 2 * idx + 2],
+                *values,
+            ):
+                blocked_idxs.append(idx)
+        return sorted(blocked_idxs)
+
+    def __changed_tiles(self) -> list[int]:
+        tile_width, tile_height = tile_size()
+        if self._is_vectorized():
+            length = 2 * self.size
+            tile_sizes = numpy.tile((tile_width, tile_height), self.size)
+            is_changed = numpy.floor(
+                self._numpy(self.previous_positions)[:length] / tile_sizes
+            ) != numpy.floor(self._numpy(self.positions)[:length] / tile_sizes)
+            return numpy.flatnonzero(is_changed[0::2] | is_changed[1::2]).tolist()
+
+        positions, previous_positions = self.positions, self.previous_positions
+        return [
+            idx
+            for idx in range(self.size)
+            if math.floor(positions[2 * idx] / tile_width)
+            != math.floor(previous_positions[2 * idx] / tile_width)
+            or math.floor(positions[2 * idx + 1] / tile_height)
+            != math.floor(previous_positions[2 * idx + 1] / tile_height)
+        ]
+
+    def __blocked_at_position(self, grid: TileGrid, *values: enum.Enum) -> list[int]:
+        tile_width, tile_height = tile_size()
+        if self._is_vectorized():
+            positions = self._numpy(self.positions)
+            tile_is = numpy.floor(positions[0 : 2 * self.size : 2] / tile_width)
+            tile_js = numpy.floor(positions[1 : 2 * self.size : 2] / tile_height)
+            is_in_grid = (
+                (0 <= tile_is)
+                & (tile_is < grid.width)
+                & (0 <= tile_js)
+                & (tile_js < grid.height)
+            )
+            cell_idxs = numpy.where(is_in_grid, tile_js * grid.width + tile_is, 0)
+            cells = numpy.frombuffer(grid.cells, dtype=numpy.uint8)
+            codes = numpy.array([grid.codes[value] for value in values])
+            is_blocked = ~is_in_grid | numpy.isin(
+                cells[cell_idxs.astype(numpy.intp)], codes
+            )
+            return numpy.flatnonzero(is_blocked).tolist()
+
+        codes = {grid.codes[value] for value in values}
+        positions, cells = self.positions, grid.cells
+        blocked_idxs = []
+        for idx in range(self.size):
+            tile_i = math.floor(positions[2 * idx] / tile_width)
+            tile_j = math.floor(positions[2 * idx + 1] / tile_height)
+            if (
+                not (0 <= tile_i < grid.width and 0 <= tile_j < grid.height)
+                or cells[tile_j * grid.width + tile_i] in codes
+            ):
+                blocked_idxs.append(idx)
+        return blocked_idxs
+
+
+class CharacterStore(EntityStore[Monster]):
+    # Characters walking from tile to tile, all moved at once. Only characters walking
+    # have a direction, the others stay in place. Views are the characters themselves,
+    # which keep their slot while alive and are given a new one when others are
+    # removed.
+
+    def __init__(
+        self,
+        capacity: int,
+        collision_size: tuple[int, int],
+        numpy_min_size: int | None = ENTITY_STORE_NUMPY_MIN_SIZE,
+    ) -> None:
+        super().__init__(capacity, collision_size, numpy_min_size)
+        self.life_points = self._zeros(capacity, "i")
+        self.states = self._zeros(capacity, "i")
+
+    def _value_arrays(self) -> list:
+        return super()._value_arrays() + [self.life_points, self.states]
+
+    def add(
+        self,
+        character: Monster,
+        position: pygame.Vector2 | tuple[float, float],
+        speed: float,
+        life_points: int,
+    ) -> bool:
+        idx = self._add_slot(position, (0.0, 0.0), speed)
+        if idx is None:
+            return False
+
+        self.life_points[idx] = life_points
+        self.states[idx] = CharacterState.IDLE.value
+        character.store = self
+        character.idx = idx
+        self.views.append(character)
+        return True
+
+    def defeated(self) -> list[int]:
+        # Slots of the characters with no life points left
+        if self._is_vectorized():
+            life_points = self._numpy(self.life_points)[: self.size]
+            return numpy.flatnonzero(life_points <= 0).tolist()
+        return [idx for idx in range(self.size) if self.life_points[idx] <= 0]
+
+    def _on_removed(self, kept_idxs: typing.Sequence[int]) -> None:
+        self.views = [self.views[idx] for idx in kept_idxs]
+        for idx, character in enumerate(self.views):
+            character.idx = idx
+
+    def clear(self) -> None:
+        super().clear()
+        self.views = []
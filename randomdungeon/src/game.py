@@ -1,6 +1,10 @@
 import enum
 import pygame
+import random
 
+from grids import *
+from render import *
+from walkable import *
 from utils import *
 
 
@@ -22,46 +26,116 @@ class GameObjectType(enum.StrEnum):
 
 
 class Game:
-    def __init__(self, map_size_in_tiles: tuple[int, int]) -> None:
+    def __init__(
+        self, map_size_in_tiles: tuple[int, int], seed: int | None = None
+    ) -> None:
         self.state = GameState.START_DISPLAY_MENU
 
-        self.title_font = pygame.font.Font(None, 80)
-        self.menu_font = pygame.font.Font(None, 40)
+        # All randomness of a run derives from this seed, so that runs can be replayed
+        self.seed = seed
+        self.random = random.Random(seed)
+
+        self.title_font = text_cache.font(80)
+        self.menu_font = text_cache.font(40)
 
         self.map_width_in_tiles, self.map_height_in_tiles = map_size_in_tiles
-        self.map = [
-            [GameObjectType.FLOOR] * self.map_width_in_tiles
-            for _ in range(self.map_height_in_tiles)
-        ]
+        self.map = TileGrid(GameObjectType, map_size_in_tiles, GameObjectType.FLOOR)
+        self.tile_positions = TilePositions(map_size_in_tiles)
+        # Tiles monsters can wander to from each tile, kept in sync with the terrain
+        self.wander_reach = AxisReach(
+            self.map,
+            MONSTER_WANDER_MAX_DISTANCE,
+            (GameObjectType.FLOOR, GameObjectType.OPEN_DOOR),
+        )
 
         self.hero_life_points = 3
 
         self.level = 1
 
-        self.door_left_tile_idx = pygame.Vector2(7.0, 1.0)
-        self.door_right_tile_idx = pygame.Vector2(8.0, 1.0)
+        # Characters standing on each tile, updated only when they change tiles
+        self.occupants: dict[tuple[int, int], list[GameObjectType]] = {}
 
-        self.background_music = pygame.mixer.Sound(
-            AUDIO_MUSIC_PATH / "dungeon-maze.mp3"
+    def object_at(self, tile_idx: pygame.Vector2 | tuple[int, int]) -> GameObjectType:
+        if occupants := self.occupants.get((int(tile_idx[0]), int(tile_idx[1]))):
+            return occupants[-1]
+        return self.map[tile_idx]
+
+    def is_walkable(self, tile_idx: pygame.Vector2 | tuple[int, int]) -> bool:
+        object_type = self.object_at(tile_idx)
+        return (
+            object_type == GameObjectType.FLOOR
+            or object_type == GameObjectType.OPEN_DOOR
         )
-        self.fireball_effect = pygame.mixer.Sound(
-            AUDIO_EFFECTS_PATH / "impactBell_heavy_001.ogg"
+
+    def is_walkable_terrain(self, tile_idx: pygame.Vector2 | tuple[int, int]) -> bool:
+        object_type = self.map[tile_idx]
+        return (
+            object_type == GameObjectType.FLOOR
+            or object_type == GameObjectType.OPEN_DOOR
         )
 
-    def object_at(self, tile_idx: pygame.Vector2 | tuple[int, int]) -> GameObjectType:
-        return self.map[int(tile_idx[1])][int(tile_idx[0])]
+    def set_terrain_at(
+        self, tile_idx: pygame.Vector2 | tuple[int, int], object_type: GameObjectType
+    ) -> None:
+        self.map[tile_idx] = object_type
+        self.wander_reach.invalidate()
+
+    def set_terrain_from(
+        self,
+        other: TileGrid[S],
+        lookup: dict[S, GameObjectType],
+        rect: pygame.Rect | None = None,
+    ) -> None:
+        # Terrain of the tiles of the rect, or of the whole map, from another grid
+        self.map.translate_from(other, lookup, rect)
+        self.wander_reach.invalidate()
+
+    def add_occupant(
+        self, tile_idx: pygame.Vector2 | tuple[int, int], object_type: GameObjectType
+    ) -> None:
+        key = (int(tile_idx[0]), int(tile_idx[1]))
+        self.occupants.setdefault(key, []).append(object_type)
+
+    def remove_occupant(
+        self, tile_idx: pygame.Vector2 | tuple[int, int], object_type: GameObjectType
+    ) -> None:
+        key = (int(tile_idx[0]), int(tile_idx[1]))
+        if occupants := self.occupants.get(key):
+            occupants.remove(object_type)
+            if not occupants:
+                del self.occupants[key]
+
+    def move_occupant(
+        self,
+        from_tile_idx: pygame.Vector2 | tuple[int, int],
+        to_tile_idx: pygame.Vector2 | tuple[int, int],
+        object_type: GameObjectType,
+    ) -> None:
+        self.remove_occupant(from_tile_idx, object_type)
+        self.add_occupant(to_tile_idx, object_type)
+
+    def clear_occupants(self) -> None:
+        self.occupants.clear()
+
+    def walkable_tiles(self) -> list[tuple[int, int]]:
+        return self.map.tiles_where(GameObjectType.FLOOR, GameObjectType.OPEN_DOOR)
 
     def render_map(self) -> None:
-        # Cache text surfaces
+        # Looked up once, instead of for each tile
         object_type_text_surfs = {
             object_type: render_text(str(object_type)) for object_type in GameObjectType
         }
 
         # Blit the cached text surfaces on screen, instead of calling debug on each iteration
         # (used to incur in a huge performance loss)
-        screen = pygame.display.get_surface()
-        for j, tile_row in enumerate(self.map):
-            for i, element_type in enumerate(tile_row):
-                text_surf = object_type_text_surfs[element_type]
-                text_rect = text_surf.get_rect(topleft=tile_top_left((i, j)))
-                screen.blit(text_surf, text_rect)
+        blit_all(
+            pygame.display.get_surface(),
+            [
+                (
+                    object_type_text_surfs[self.object_at((i, j))],
+                    self.tile_positions.top_left((i, j)),
+                )
+                for j in range(self.map_height_in_tiles)
+                for i in range(self.map_width_in_tiles)
+            ],
+        )
@@ -7,6 +7,10 @@ PATH_ASSETS = Path("./randomdungeon/assets")
 WINDOW_WIDTH = 800
 WINDOW_HEIGHT = 600
 FPS = 60
+SIM_TIME_STEP_IN_SECS = 1.0 / FPS
+SIM_MAX_STEPS_PER_FRAME = 5
+
+RENDER_DIRTY_RECTS = True
 
 BACKGROUND_COLOR = "palegreen2"
 MENU_COLOR = "aquamarine4"
@@ -14,6 +18,7 @@ MENU_COLOR = "aquamarine4"
 TILE_RADIUS = 25
 
 CHARACTER_DISTANCE_TO_TILE_EPSILON = 2.0
+CHARACTER_COLLISION_BOX_SCALE = 0.8
 
 HERO_TILE_FILE_IDX = "0099"
 HERO_SPEED = 200
@@ -28,13 +33,72 @@ WEAPON_IDLE_ANGLE_IN_DEGREES = -15.0
 FIREBALL_TILE_FILE_IDX = "0132"
 FIREBALL_SPEED = 300
 FIREBALL_ROTATION_SPEED = 500
+FIREBALL_POOL_CAPACITY = 1
 
 LASER_TILE_FILE_IDX = "0133"
 LASER_SPEED = 300
+LASER_SPRITE_SCALE = 0.6
+LASER_STORE_CAPACITY = 4096
+# Move and collide monsters and projectiles with numpy once a store holds this many of
+# them, below which looping over plain arrays is faster
+ENTITY_STORE_NUMPY_MIN_SIZE = 128
 
 HEART_TILE_FILE_IDX = "0134"
 
 MONSTER_CRAB_TILE_FILE_IDX = "0110"
+MONSTER_CRAB_CHASE_PROBABILITY = 0.3
+MONSTER_DECISION_INTERVAL_IN_SECS = 5.0
+MONSTER_LIFE_POINTS = 3
+MONSTER_WANDER_MAX_DISTANCE = 5
+
+# Monster decisions are queued by due time, and at most this many run per step
+AI_MAX_DECISIONS_PER_STEP = 4
+
+FLOW_FIELD_MAX_DISTANCE = 32
+# A* gives up after expanding this many tiles, rather than flooding all tiles reachable
+# from the start when the target is walled in
+PATHFINDING_MAX_EXPANSIONS = 2048
+
+# Maps larger than a chunk are generated chunk by chunk, as the hero gets close
+DUNGEON_CHUNK_SIZE_IN_TILES = 16
+DUNGEON_CHUNK_GENERATION_RADIUS = 1
+DUNGEON_MAX_CHUNKS_PER_STEP = 1
+DUNGEON_MIN_ROOM_SIZE_IN_TILES = (4, 3)
+DUNGEON_CORRIDOR_WIDTH = 2
+DUNGEON_EXIT_PROBABILITY = 0.2
+
+DUNGEON_TILE_FILE_IDXS = {
+    "wall_parapet_top": "0026",
+    "wall_parapet_bottom": "0002",
+    "wall_parapet_top_left": "0004",
+    "wall_parapet_top_right": "0005",
+    "wall_parapet_bottom_left": "0016",
+    "wall_parapet_bottom_right": "0017",
+    "wall_parapet_top_left_corner": "0027",
+    "wall_parapet_top_right_corner": "0025",
+    "wall_parapet_bottom_left_corner": "0003",
+    "wall_parapet_bottom_right_corner": "0001",
+    "wall_front": "0014",
+    "wall_left": "0013",
+    "wall_right": "0015",
+    "floor": "0048",
+    "corridor_left": "0010",
+    "corridor_right": "0011",
+    "door_closed_left": "0046",
+    "door_closed_right": "0047",
+    "door_open_left": "0034",
+    "door_open_right": "0035",
+}
+
+PRELOAD_TILE_FILE_IDXS = [
+    HERO_TILE_FILE_IDX,
+    WEAPON_TILE_FILE_IDX,
+    FIREBALL_TILE_FILE_IDX,
+    LASER_TILE_FILE_IDX,
+    HEART_TILE_FILE_IDX,
+    MONSTER_CRAB_TILE_FILE_IDX,
+    *DUNGEON_TILE_FILE_IDXS.values(),
+]
 
 GRAPHICS_PATH = PATH_ASSETS / "graphics"
 GRAPHICS_TILES_PATH = GRAPHICS_PATH / "tiles"
@@ -43,6 +107,48 @@ AUDIO_PATH = PATH_ASSETS / "audio"
 AUDIO_MUSIC_PATH = AUDIO_PATH / "music"
 AUDIO_EFFECTS_PATH = AUDIO_PATH / "effects"
 
+# Music is streamed from disk, effects are decoded upfront
+AUDIO_MUSIC_FILE_NAME = "dungeon-maze.mp3"
+AUDIO_MUSIC_VOLUME = 0.2
+AUDIO_MUSIC_FADE_IN_MS = 5000
+AUDIO_EFFECT_FILE_NAMES = {
+    "fireball_hit": "impactBell_heavy_001.ogg",
+}
+# Channels reserved for effects, and how many of them a single effect may use at once
+AUDIO_NUM_EFFECT_CHANNELS = 8
+AUDIO_MAX_VOICES_PER_EFFECT = 2
+
+PROFILER_HISTORY_SIZE = 240
+PROFILER_CAPTURE_FRAMES = 300
+PROFILER_TRACE_PATH = "frame_trace.json"
+PROFILER_ROOM_PHASES = False
+# Allocations are traced over fewer frames, after the game has settled down
+PROFILER_ALLOCATION_FRAMES = 120
+PROFILER_ALLOCATION_WARMUP_FRAMES = 300
+PROFILER_ALLOCATION_REPORT_PATH = "frame_allocations.json"
+PROFILER_ALLOCATION_NUM_SITES = 20
+
+# Build the next room on a worker thread as soon as the doors open
+ROOM_PREFETCH = True
+
+BENCHMARK_SEED = 0
+BENCHMARK_NUM_ITERATIONS = 50
+BENCHMARK_NUM_TICKS = 300
+BENCHMARK_NUM_ALLOCATION_ITERATIONS = 10
+# Benchmarks slower than their baseline by more than this fraction are regressions
+BENCHMARK_REGRESSION_TOLERANCE = 0.15
+
+TEXT_DEFAULT_FONT_SIZE = 30
+# Rendered text surfaces kept around, least recently used ones are evicted first
+TEXT_CACHE_CAPACITY = 256
+
+# Batch simulations stop at game over, or after this many simulation steps
+BATCH_MAX_SIM_STEPS = 5 * 60 * FPS
+BATCH_OUTPUT_PATH = "batch_results.csv"
+
+# Lower values look smoother when rotating, but take more memory
+ROTATION_CACHE_ANGLE_STEP_IN_DEGREES = 5.0
+
 DEBUG_RENDER_STATS = False
 DEBUG_RENDER_TILE_BORDERS = False
 DEBUG_RENDER_GAME_MAP = False
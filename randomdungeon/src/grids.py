@@ -0,0 +1,138 @@
+import enum
+import pygame
+import typing
+
+T = typing.TypeVar("T", bound=enum.Enum)
+S = typing.TypeVar("S", bound=enum.Enum)
+
+
+class TileGrid(typing.Generic[T]):
+    # Row-major grid storing one byte per tile, which indexes into the members of an
+    # enum. Bulk operations work on whole rows or on the full byte array at once.
+
+    def __init__(
+        self, object_types: type[T], size_in_tiles: tuple[int, int], fill_value: T
+    ) -> None:
+        self.object_types = object_types
+        self.members: list[T] = list(object_types)
+        self.codes: dict[T, int] = {
+            member: code for code, member in enumerate(self.members)
+        }
+        if len(self.members) > 256:
+            raise ValueError(f"Too many members in {object_types} for a byte grid")
+
+        self.width, self.height = size_in_tiles
+        self.cells = bytearray([self.codes[fill_value]]) * (self.width * self.height)
+
+    def __getitem__(self, tile_idx: pygame.Vector2 | tuple[int, int]) -> T:
+        return self.members[
+            self.cells[int(tile_idx[1]) * self.width + int(tile_idx[0])]
+        ]
+
+    def __setitem__(self, tile_idx: pygame.Vector2 | tuple[int, int], value: T):
+        self.cells[int(tile_idx[1]) * self.width + int(tile_idx[0])] = self.codes[value]
+
+    def is_valid_tile(self, tile_idx: pygame.Vector2 | tuple[int, int]) -> bool:
+        return (
+            0 <= int(tile_idx[0]) < self.width and 0 <= int(tile_idx[1]) < self.height
+        )
+
+    def items(self) -> typing.Iterator[tuple[tuple[int, int], T]]:
+        members = self.members
+        for idx, code in enumerate(self.cells):
+            yield (idx % self.width, idx // self.width), members[code]
+
+    def items_in_rect(
+        self, rect: pygame.Rect | tuple[int, int, int, int]
+    ) -> typing.Iterator[tuple[tuple[int, int], T]]:
+        rect = pygame.Rect(rect).clip(0, 0, self.width, self.height)
+        members = self.members
+        for j in range(rect.top, rect.bottom):
+            start = j * self.width + rect.left
+            for i, code in enumerate(self.cells[start : start + rect.width], rect.left):
+                yield (i, j), members[code]
+
+    def fill(self, value: T) -> None:
+        self.cells[:] = bytes([self.codes[value]]) * len(self.cells)
+
+    def fill_rect(self, rect: pygame.Rect | tuple[int, int, int, int], value: T):
+        rect = pygame.Rect(rect).clip(0, 0, self.width, self.height)
+        row = bytes([self.codes[value]]) * rect.width
+        for j in range(rect.top, rect.bottom):
+            start = j * self.width + rect.left
+            self.cells[start : start + rect.width] = row
+
+    def stamp(self, other: "TileGrid[T]", top_left: tuple[int, int]) -> None:
+        if other.object_types is not self.object_types:
+            raise ValueError("Cannot stamp grids of different object types")
+
+        rect = pygame.Rect(top_left, (other.width, other.height))
+        clipped_rect = rect.clip(0, 0, self.width, self.height)
+        for j in range(clipped_rect.top, clipped_rect.bottom):
+            start = j * self.width + clipped_rect.left
+            other_start = (j - rect.top) * other.width + (clipped_rect.left - rect.left)
+            self.cells[start : start + clipped_rect.width] = other.cells[
+                other_start : other_start + clipped_rect.width
+            ]
+
+    def translate_from(
+        self,
+        other: "TileGrid[S]",
+        lookup: dict[S, T],
+        rect: pygame.Rect | tuple[int, int, int, int] | None = None,
+    ) -> None:
+        if (other.width, other.height) != (self.width, self.height):
+            raise ValueError("Cannot translate grids of different sizes")
+
+        table = bytearray(256)
+        for member, code in other.codes.items():
+            table[code] = self.codes[lookup[member]]
+        if rect is None:
+            self.cells[:] = other.cells.translate(table)
+            return
+
+        rect = pygame.Rect(rect).clip(0, 0, self.width, self.height)
+        for j in range(rect.top, rect.bottom):
+            start = j * self.width + rect.left
+            self.cells[start : start + rect.width] = other.cells[
+                start : start + rect.width
+            ].translate(table)
+
+    def mask(self, *values: T) -> bytes:
+        return self.cells.translate(self.__mask_table(values))
+
+    def mask_rect(
+        self, rect: pygame.Rect | tuple[int, int, int, int], *values: T
+    ) -> bytes:
+        # Same as mask for the tiles of a rect, which may reach out of the grid. Tiles
+        # out of the grid never match.
+        rect = pygame.Rect(rect)
+        clipped_rect = rect.clip(0, 0, self.width, self.height)
+        table = self.__mask_table(values)
+
+        mask = bytearray(rect.width * rect.height)
+        for j in range(clipped_rect.top, clipped_rect.bottom):
+            start = j * self.width + clipped_rect.left
+            mask_start = (j - rect.top) * rect.width + (clipped_rect.left - rect.left)
+            mask[mask_start : mask_start + clipped_rect.width] = self.cells[
+                start : start + clipped_rect.width
+            ].translate(table)
+        return bytes(mask)
+
+    def count(self, *values: T) -> int:
+        return self.mask(*values).count(1)
+
+    def __mask_table(self, values: tuple[T, ...]) -> bytes:
+        table = bytearray(256)
+        for value in values:
+            table[self.codes[value]] = 1
+        return bytes(table)
+
+    def tiles_where(self, *values: T) -> list[tuple[int, int]]:
+        mask = self.mask(*values)
+        tiles = []
+        idx = mask.find(1)
+        while idx >= 0:
+            tiles.append((idx % self.width, idx // self.width))
+            idx = mask.find(1, idx + 1)
+        return tiles
@@ -1,8 +1,74 @@
 def main():
+    import argparse
+
+    from bots import RandomClickBot
     from engine import Engine
+    from globals import (
+        PROFILER_ALLOCATION_FRAMES,
+        PROFILER_ALLOCATION_WARMUP_FRAMES,
+        PROFILER_CAPTURE_FRAMES,
+    )
+    from profiler import allocation_profiler, profiler
+    from replay import Replay
+
+    parser = argparse.ArgumentParser(description="Random Dungeon")
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="run without window nor sound, driven by a bot clicking randomly",
+    )
+    parser.add_argument("--frames", type=int, help="stop after this many frames")
+    parser.add_argument(
+        "--trace",
+        metavar="PATH",
+        help="write a Chrome trace of the first frames to this file",
+    )
+    parser.add_argument(
+        "--allocations",
+        metavar="PATH",
+        help="write a report of what frames allocate, once warmed up, to this file",
+    )
+    parser.add_argument("--seed", type=int, help="seed of the run")
+    parser.add_argument(
+        "--map-size",
+        type=lambda value: tuple(int(size) for size in value.split("x")),
+        metavar="WIDTHxHEIGHT",
+        help="size of the dungeon in tiles, the window size by default",
+    )
+    parser.add_argument(
+        "--record", metavar="PATH", help="record the input of the run to this file"
+    )
+    parser.add_argument(
+        "--replay", metavar="PATH", help="replay a run recorded with --record"
+    )
+    args = parser.parse_args()
+
+    if args.trace:
+        profiler.capture(PROFILER_CAPTURE_FRAMES, args.trace)
+    if args.allocations:
+        allocation_profiler.capture(
+            PROFILER_ALLOCATION_FRAMES,
+            args.allocations,
+            PROFILER_ALLOCATION_WARMUP_FRAMES,
+        )
+
+    replay = Replay.load(args.replay) if args.replay else None
+    input_script = RandomClickBot(args.seed) if args.headless else None
+    with Engine(
+        headless=args.headless,
+        input_script=input_script,
+        seed=args.seed,
+        record_path=args.record,
+        replay=replay,
+        map_size_in_tiles=args.map_size,
+    ) as engine:
+        engine.run(max_frames=args.frames)
 
-    with Engine() as engine:
-        engine.run()
+        if args.headless:
+            print(
+                f"Frames: {engine.num_frames}, level: {engine.game.level}, "
+                f"life: {engine.game.hero_life_points}, seed: {engine.seed}"
+            )
 
 
 if __name__ == "__main__":
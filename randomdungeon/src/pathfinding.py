@@ -0,0 +1,142 @@
+import array
+import collections
+import heapq
+import itertools
+import pygame
+
+from game import *
+from globals import *
+
+NEIGHBOUR_OFFSETS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+
+def find_path(
+    game: Game,
+    start_tile_idx: pygame.Vector2 | tuple[int, int],
+    target_tile_idx: pygame.Vector2 | tuple[int, int],
+    max_expansions: int = PATHFINDING_MAX_EXPANSIONS,
+) -> list[tuple[int, int]] | None:
+    # A* on the 4-connected tile grid. Returns the tiles to walk through, excluding
+    # the start tile, or None when the target cannot be reached within max_expansions
+    # expanded tiles.
+    start = (int(start_tile_idx[0]), int(start_tile_idx[1]))
+    target = (int(target_tile_idx[0]), int(target_tile_idx[1]))
+    if start == target or not game.is_walkable(target):
+        return None
+
+    def heuristic(tile: tuple[int, int]) -> int:
+        return abs(tile[0] - target[0]) + abs(tile[1] - target[1])
+
+    # The counter breaks ties in insertion order, so paths keep going straight
+    counter = itertools.count()
+    open_heap = [(heuristic(start), 0, next(counter), start)]
+    previous_tiles: dict[tuple[int, int], tuple[int, int]] = {}
+    costs = {start: 0}
+
+    while open_heap:
+        _, cost, _, tile = heapq.heappop(open_heap)
+        if tile == target:
+            path = [tile]
+            while (tile := previous_tiles[tile]) != start:
+                path.append(tile)
+            path.reverse()
+            return path
+
+        if cost > costs[tile]:
+            continue
+        if max_expansions == 0:
+            return None
+        max_expansions -= 1
+
+        for offset_i, offset_j in NEIGHBOUR_OFFSETS:
+            neighbour = (tile[0] + offset_i, tile[1] + offset_j)
+            neighbour_cost = cost + 1
+            if neighbour_cost >= costs.get(neighbour, neighbour_cost + 1):
+                continue
+            if not game.map.is_valid_tile(neighbour) or not game.is_walkable(neighbour):
+                continue
+
+            costs[neighbour] = neighbour_cost
+            previous_tiles[neighbour] = tile
+            heapq.heappush(
+                open_heap,
+                (
+                    neighbour_cost + heuristic(neighbour),
+                    neighbour_cost,
+                    next(counter),
+                    neighbour,
+                ),
+            )
+
+    return None
+
+
+class FlowField:
+    # Breadth-first search from a goal tile over the terrain. Every reached tile
+    # stores the direction of its next step towards the goal, so any number of
+    # characters can follow the field in constant time per step.
+
+    UNREACHABLE = -1
+
+    def __init__(self, map_size_in_tiles: tuple[int, int]) -> None:
+        self.width, self.height = map_size_in_tiles
+        self.goal_tile_idx: tuple[int, int] | None = None
+        self.distances = array.array("i", [self.UNREACHABLE]) * (
+            self.width * self.height
+        )
+        # Index into NEIGHBOUR_OFFSETS plus one, zero meaning no step
+        self.directions = bytearray(self.width * self.height)
+
+    def update(
+        self,
+        game: Game,
+        goal_tile_idx: pygame.Vector2 | tuple[int, int],
+        max_distance: int = FLOW_FIELD_MAX_DISTANCE,
+    ) -> None:
+        goal = (int(goal_tile_idx[0]), int(goal_tile_idx[1]))
+        self.goal_tile_idx = goal
+
+        distances = self.distances
+        distances[:] = array.array("i", [self.UNREACHABLE]) * len(distances)
+        self.directions[:] = bytes(len(self.directions))
+
+        distances[goal[1] * self.width + goal[0]] = 0
+        queue = collections.deque([goal])
+        while queue:
+            tile = queue.popleft()
+            distance = distances[tile[1] * self.width + tile[0]]
+            if distance >= max_distance:
+                continue
+
+            for direction_code, (offset_i, offset_j) in enumerate(NEIGHBOUR_OFFSETS):
+                neighbour = (tile[0] - offset_i, tile[1] - offset_j)
+                if not (
+                    0 <= neighbour[0] < self.width and 0 <= neighbour[1] < self.height
+                ):
+                    continue
+
+                neighbour_idx = neighbour[1] * self.width + neighbour[0]
+                if distances[neighbour_idx] != self.UNREACHABLE:
+                    continue
+                if not game.is_walkable_terrain(neighbour):
+                    continue
+
+                # Stepping by the offset from the neighbour leads back to this tile
+                distances[neighbour_idx] = distance + 1
+                self.directions[neighbour_idx] = direction_code + 1
+                queue.append(neighbour)
+
+    def distance(self, tile_idx: pygame.Vector2 | tuple[int, int]) -> int | None:
+        distance = self.distances[int(tile_idx[1]) * self.width + int(tile_idx[0])]
+        return None if distance == self.UNREACHABLE else distance
+
+    def next_tile(
+        self, tile_idx: pygame.Vector2 | tuple[int, int]
+    ) -> tuple[int, int] | None:
+        i, j = int(tile_idx[0]), int(tile_idx[1])
+        direction_code = self.directions[j * self.width + i]
+        if not direction_code:
+            return None
+
+        offset_i, offset_j = NEIGHBOUR_OFFSETS[direction_code - 1]
+        return i + offset_i, j + offset_j
@@ -0,0 +1,62 @@
+import typing
+
+
+class Poolable(typing.Protocol):
+    def reset(self) -> None: ...
+
+
+T = typing.TypeVar("T", bound=Poolable)
+
+
+class ObjectPool(typing.Generic[T]):
+    # Recycles objects instead of allocating new ones. At most capacity objects are
+    # ever created, acquiring more than that fails until some are released.
+
+    def __init__(self, factory: typing.Callable[[], T], capacity: int) -> None:
+        self.factory = factory
+        self.capacity = capacity
+        self.free_objects: list[T] = []
+
+        self.num_created = 0
+        self.num_in_use = 0
+        self.peak_in_use = 0
+        self.num_reused = 0
+        self.num_rejected = 0
+
+    def preallocate(self, num_objects: int | None = None) -> None:
+        num_objects = self.capacity if num_objects is None else num_objects
+        while self.num_created < min(num_objects, self.capacity):
+            self.free_objects.append(self.factory())
+            self.num_created += 1
+
+    def acquire(self) -> T | None:
+        if self.free_objects:
+            obj = self.free_objects.pop()
+            self.num_reused += 1
+        elif self.num_created < self.capacity:
+            obj = self.factory()
+            self.num_created += 1
+        else:
+            self.num_rejected += 1
+            return None
+
+        obj.reset()
+        self.num_in_use += 1
+        self.peak_in_use = max(self.peak_in_use, self.num_in_use)
+        return obj
+
+    def release(self, obj: T) -> None:
+        self.num_in_use -= 1
+        self.free_objects.append(obj)
+
+    def clear(self) -> None:
+        # Drop all objects, e.g. because their surfaces belong to a closed display
+        self.free_objects.clear()
+        self.num_created = 0
+        self.num_in_use = 0
+
+    def stats(self) -> str:
+        return (
+            f"{self.num_in_use}/{self.capacity} in use, peak {self.peak_in_use}, "
+            f"reused {self.num_reused}, rejected {self.num_rejected}"
+        )
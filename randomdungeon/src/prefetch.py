@@ -0,0 +1,66 @@
+import concurrent.futures
+import typing
+
+T = typing.TypeVar("T")
+
+
+class Prefetcher(typing.Generic[T]):
+    # Builds one object ahead of time on a worker thread, e.g. the next room while the
+    # current one is still being played. Objects are identified by a key, so that a
+    # stale prefetch is never handed out.
+
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self.executor: concurrent.futures.ThreadPoolExecutor | None = None
+        self.key: typing.Hashable | None = None
+        self.future: concurrent.futures.Future[T] | None = None
+
+        self.num_prefetched = 0
+        self.num_waited = 0
+        self.num_fallbacks = 0
+
+    def prefetch(self, key: typing.Hashable, factory: typing.Callable[[], T]) -> None:
+        if not self.enabled or key == self.key:
+            return
+
+        self.cancel()
+        if not self.executor:
+            self.executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="prefetch"
+            )
+        self.key = key
+        self.future = self.executor.submit(factory)
+
+    def take(self, key: typing.Hashable, factory: typing.Callable[[], T]) -> T:
+        future = self.future if key == self.key else None
+        self.key = None
+        self.future = None
+
+        if future and future.done():
+            self.num_prefetched += 1
+            return future.result()
+        if future and not future.cancel():
+            # Already being built, finishing it is quicker than starting over
+            self.num_waited += 1
+            return future.result()
+
+        self.num_fallbacks += 1
+        return factory()
+
+    def cancel(self) -> None:
+        if self.future:
+            self.future.cancel()
+        self.key = None
+        self.future = None
+
+    def shutdown(self) -> None:
+        self.cancel()
+        if self.executor:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+
+    def stats(self) -> str:
+        return (
+            f"{self.num_prefetched} ready, {self.num_waited} waited, "
+            f"{self.num_fallbacks} fallbacks"
+        )
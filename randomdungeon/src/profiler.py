@@ -0,0 +1,328 @@
+import collections
+import contextlib
+import json
+import pygame
+import sys
+import time
+import tracemalloc
+import typing
+
+from pathlib import Path
+
+from globals import *
+
+
+class ProfilerPhase:
+    __slots__ = ("profiler", "name", "category", "start_time_in_ns")
+
+    def __init__(self, profiler: "FrameProfiler", name: str, category: str) -> None:
+        self.profiler = profiler
+        self.name = name
+        self.category = category
+        self.start_time_in_ns = 0
+
+    def __enter__(self) -> None:
+        self.start_time_in_ns = time.perf_counter_ns()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.profiler.record(
+            self.name, self.category, self.start_time_in_ns, time.perf_counter_ns()
+        )
+
+
+class FrameProfiler:
+    # Times the phases of every frame and keeps a rolling history of them. Frames can
+    # also be captured as Chrome trace events, to be inspected in about://tracing or
+    # in Perfetto.
+
+    def __init__(self, history_size: int = PROFILER_HISTORY_SIZE) -> None:
+        self.frame_times_in_ms: collections.deque[float] = collections.deque(
+            maxlen=history_size
+        )
+        self.phase_times_in_ms: dict[str, collections.deque[float]] = {}
+        self.history_size = history_size
+
+        self.frame_start_time_in_ns = 0
+        self.current_phase_times_in_ns: dict[str, int] = {}
+
+        self.trace_events: list[dict] = []
+        self.num_capture_frames_left = 0
+        self.capture_path: Path | None = None
+
+        self.null_phase = contextlib.nullcontext()
+
+    def phase(self, name: str, category: str = "engine") -> ProfilerPhase:
+        return ProfilerPhase(self, name, category)
+
+    def room_phase(self, name: str) -> ProfilerPhase | contextlib.nullcontext[None]:
+        # Finer grained phases inside rooms, which are only timed when asked for
+        if not PROFILER_ROOM_PHASES:
+            return self.null_phase
+        return ProfilerPhase(self, name, "room")
+
+    def begin_frame(self) -> None:
+        self.frame_start_time_in_ns = time.perf_counter_ns()
+        self.current_phase_times_in_ns.clear()
+
+    def end_frame(self) -> None:
+        frame_end_time_in_ns = time.perf_counter_ns()
+        self.frame_times_in_ms.append(
+            (frame_end_time_in_ns - self.frame_start_time_in_ns) / 1e6
+        )
+
+        for name, phase_time_in_ns in self.current_phase_times_in_ns.items():
+            if name not in self.phase_times_in_ms:
+                self.phase_times_in_ms[name] = collections.deque(
+                    maxlen=self.history_size
+                )
+            self.phase_times_in_ms[name].append(phase_time_in_ns / 1e6)
+
+        if self.num_capture_frames_left > 0:
+            self.__add_trace_event(
+                "frame", "frame", self.frame_start_time_in_ns, frame_end_time_in_ns
+            )
+            self.num_capture_frames_left -= 1
+            if self.num_capture_frames_left == 0:
+                self.finish_capture()
+
+    def record(
+        self, name: str, category: str, start_time_in_ns: int, end_time_in_ns: int
+    ) -> None:
+        # Phases running several times per frame, like simulation steps, add up
+        self.current_phase_times_in_ns[name] = (
+            self.current_phase_times_in_ns.get(name, 0)
+            + end_time_in_ns
+            - start_time_in_ns
+        )
+
+        if self.num_capture_frames_left > 0:
+            self.__add_trace_event(name, category, start_time_in_ns, end_time_in_ns)
+
+    def capture(self, num_frames: int, path: Path | str | None = None) -> None:
+        # A capture still going on is kept rather than thrown away
+        self.finish_capture()
+        self.trace_events = []
+        self.num_capture_frames_left = num_frames
+        self.capture_path = Path(path) if path else None
+
+    def is_capturing(self) -> bool:
+        return self.num_capture_frames_left > 0
+
+    def finish_capture(self) -> None:
+        # Also called when the game stops before all frames were captured, so that
+        # whatever was captured until then is written
+        if self.capture_path and self.trace_events:
+            self.dump_chrome_trace(self.capture_path)
+        self.num_capture_frames_left = 0
+        self.capture_path = None
+
+    def dump_chrome_trace(self, path: Path | str) -> None:
+        with open(path, "w") as trace_file:
+            json.dump(
+                {"traceEvents": self.trace_events, "displayTimeUnit": "ms"},
+                trace_file,
+            )
+
+    def percentiles(
+        self, values: typing.Collection[float] | None = None
+    ) -> dict[str, float]:
+        values = self.frame_times_in_ms if values is None else values
+        if not values:
+            return {"p50": 0.0, "p95": 0.0, "p99": 0.0}
+
+        sorted_values = sorted(values)
+        last_idx = len(sorted_values) - 1
+        return {
+            f"p{percentile}": sorted_values[round(last_idx * percentile / 100)]
+            for percentile in (50, 95, 99)
+        }
+
+    def render_graph(self, surface: pygame.Surface, rect: pygame.Rect) -> None:
+        # One bar per frame, with a line at the frame budget
+        pygame.draw.rect(surface, "black", rect)
+
+        max_frame_time_in_ms = 2000.0 / FPS
+        bar_width = rect.width / self.history_size
+        for idx, frame_time_in_ms in enumerate(self.frame_times_in_ms):
+            bar_height = min(1.0, frame_time_in_ms / max_frame_time_in_ms) * rect.height
+            # Frames include the wait in clock.tick, so allow for some jitter
+            bar_color = "green" if frame_time_in_ms <= 1200.0 / FPS else "red"
+            pygame.draw.rect(
+                surface,
+                bar_color,
+                (
+                    rect.left + idx * bar_width,
+                    rect.bottom - bar_height,
+                    max(1.0, bar_width),
+                    bar_height,
+                ),
+            )
+
+        budget_y = rect.bottom - rect.height / 2
+        pygame.draw.line(
+            surface, "yellow", (rect.left, budget_y), (rect.right, budget_y)
+        )
+
+    def __add_trace_event(
+        self, name: str, category: str, start_time_in_ns: int, end_time_in_ns: int
+    ) -> None:
+        self.trace_events.append(
+            {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": start_time_in_ns / 1000,
+                "dur": (end_time_in_ns - start_time_in_ns) / 1000,
+                "pid": 1,
+                "tid": 1,
+            }
+        )
+
+
+class AllocationProfiler:
+    # Traces the memory allocated by every frame with tracemalloc. Temporary objects
+    # freed before the end of a frame only show in how high memory peaks during the
+    # frame, as the lines allocating them cannot be found afterwards. Lines are only
+    # reported for blocks still alive at the end of frames. Tracing slows everything
+    # down a lot, so it is only turned on for a number of frames, possibly after some
+    # to warm up.
+
+    def __init__(self) -> None:
+        self.num_warmup_frames_left = 0
+        self.num_capture_frames_left = 0
+        self.report_path: Path | None = None
+
+        self.start_snapshot: tracemalloc.Snapshot | None = None
+        self.start_size = 0
+        self.frame_peak_sizes: list[int] = []
+        self.frame_net_sizes: list[int] = []
+        self.frame_num_retained_blocks: list[int] = []
+        # Blocks allocated by a line of code and still alive at the end of a frame
+        self.site_sizes: collections.Counter[str] = collections.Counter()
+        self.site_num_blocks: collections.Counter[str] = collections.Counter()
+
+    def capture(
+        self,
+        num_frames: int,
+        path: Path | str | None = None,
+        num_warmup_frames: int = 0,
+    ) -> None:
+        self.finish_capture()
+        self.num_warmup_frames_left = num_warmup_frames
+        self.num_capture_frames_left = num_frames
+        self.report_path = Path(path) if path else None
+
+        self.frame_peak_sizes = []
+        self.frame_net_sizes = []
+        self.frame_num_retained_blocks = []
+        self.site_sizes.clear()
+        self.site_num_blocks.clear()
+
+    def is_capturing(self) -> bool:
+        return self.num_capture_frames_left > 0
+
+    def begin_frame(self) -> None:
+        if self.num_warmup_frames_left > 0 or self.num_capture_frames_left == 0:
+            return
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.start_snapshot = self.__take_snapshot()
+        tracemalloc.reset_peak()
+        self.start_size, _ = tracemalloc.get_traced_memory()
+
+    def end_frame(self) -> None:
+        if self.num_warmup_frames_left > 0:
+            self.num_warmup_frames_left -= 1
+            return
+        if self.num_capture_frames_left == 0 or not self.start_snapshot:
+            return
+
+        end_size, peak_size = tracemalloc.get_traced_memory()
+        self.frame_peak_sizes.append(peak_size - self.start_size)
+        self.frame_net_sizes.append(end_size - self.start_size)
+
+        num_retained_blocks = 0
+        for stat in self.__take_snapshot().compare_to(self.start_snapshot, "lineno"):
+            if stat.count_diff > 0:
+                frame = stat.traceback[0]
+                site = f"{Path(frame.filename).name}:{frame.lineno}"
+                self.site_sizes[site] += stat.size_diff
+                self.site_num_blocks[site] += stat.count_diff
+                num_retained_blocks += stat.count_diff
+        self.frame_num_retained_blocks.append(num_retained_blocks)
+        self.start_snapshot = None
+
+        self.num_capture_frames_left -= 1
+        if self.num_capture_frames_left == 0:
+            self.finish_capture()
+
+    def finish_capture(self) -> None:
+        # Also called when the game stops before all frames were captured, so that
+        # whatever was captured until then is written and tracing does not go on
+        if not self.is_capturing() and not self.report_path:
+            return
+
+        if self.is_capturing():
+            print(
+                f"Allocation capture stopped early, after {len(self.frame_peak_sizes)} "
+                f"frames with {self.num_capture_frames_left} left and "
+                f"{self.num_warmup_frames_left} warm-up frames left",
+                file=sys.stderr,
+            )
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.start_snapshot = None
+        if self.report_path:
+            self.dump_report(self.report_path)
+
+        self.num_warmup_frames_left = 0
+        self.num_capture_frames_left = 0
+        self.report_path = None
+
+    def report(self, num_sites: int = PROFILER_ALLOCATION_NUM_SITES) -> dict:
+        num_frames = len(self.frame_peak_sizes)
+        if not num_frames:
+            return {"frames": 0, "retained_sites": []}
+
+        transient_sizes = [
+            peak_size - net_size
+            for peak_size, net_size in zip(self.frame_peak_sizes, self.frame_net_sizes)
+        ]
+        return {
+            "frames": num_frames,
+            # Above the memory in use when frames start
+            "max_peak_kib_per_frame": max(self.frame_peak_sizes) / 1024,
+            "mean_peak_kib_per_frame": sum(self.frame_peak_sizes) / num_frames / 1024,
+            # Freed again before the end of frames, at least, as memory freed early
+            # in a frame may be reused later in it
+            "transient_kib_per_frame": sum(transient_sizes) / num_frames / 1024,
+            "net_kib_per_frame": sum(self.frame_net_sizes) / num_frames / 1024,
+            "retained_blocks_per_frame": sum(self.frame_num_retained_blocks)
+            / num_frames,
+            "retained_sites": [
+                {
+                    "site": site,
+                    "blocks_per_frame": num_blocks / num_frames,
+                    "kib_per_frame": self.site_sizes[site] / num_frames / 1024,
+                }
+                for site, num_blocks in self.site_num_blocks.most_common(num_sites)
+            ],
+        }
+
+    def dump_report(self, path: Path | str) -> None:
+        with open(path, "w") as report_file:
+            json.dump(self.report(), report_file, indent=2)
+
+    def __take_snapshot(self) -> tracemalloc.Snapshot:
+        # Leaving out what tracing itself allocates
+        return tracemalloc.take_snapshot().filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+            )
+        )
+
+
+profiler = FrameProfiler()
+allocation_profiler = AllocationProfiler()
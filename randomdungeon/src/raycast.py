@@ -0,0 +1,78 @@
+import math
+import pygame
+
+from grids import *
+from utils import *
+
+
+class RayHit:
+    def __init__(self, tile_idx: tuple[int, int], point: pygame.Vector2) -> None:
+        # First blocking tile along the ray, and where the ray enters it
+        self.tile_idx = tile_idx
+        self.point = point
+
+
+def cast_ray(
+    grid: TileGrid[T],
+    start: pygame.Vector2 | tuple[float, float],
+    end: pygame.Vector2 | tuple[float, float],
+    *blocking_values: T,
+) -> RayHit | None:
+    # Visits every tile the segment goes through, in order, stepping from one tile
+    # border to the next (Amanatides and Woo). Tiles out of the grid block the ray.
+    blocking_codes = {grid.codes[value] for value in blocking_values}
+    tile_width, tile_height = tile_size()
+    start_x, start_y = start[0], start[1]
+    delta_x, delta_y = end[0] - start_x, end[1] - start_y
+
+    tile_i, tile_j = math.floor(start_x / tile_width), math.floor(start_y / tile_height)
+    end_tile_i = math.floor(end[0] / tile_width)
+    end_tile_j = math.floor(end[1] / tile_height)
+
+    # Fraction of the segment at which the next vertical and horizontal borders are
+    # crossed, and between two consecutive borders
+    step_i = 1 if delta_x > 0 else -1
+    step_j = 1 if delta_y > 0 else -1
+    if delta_x:
+        next_border_x = (tile_i + (step_i > 0)) * tile_width
+        t_max_x = (next_border_x - start_x) / delta_x
+        t_delta_x = tile_width / abs(delta_x)
+    else:
+        t_max_x = t_delta_x = math.inf
+    if delta_y:
+        next_border_y = (tile_j + (step_j > 0)) * tile_height
+        t_max_y = (next_border_y - start_y) / delta_y
+        t_delta_y = tile_height / abs(delta_y)
+    else:
+        t_max_y = t_delta_y = math.inf
+
+    t = 0.0
+    while True:
+        if (
+            not (0 <= tile_i < grid.width and 0 <= tile_j < grid.height)
+            or grid.cells[tile_j * grid.width + tile_i] in blocking_codes
+        ):
+            return RayHit(
+                (tile_i, tile_j),
+                pygame.Vector2(start_x + delta_x * t, start_y + delta_y * t),
+            )
+        if (tile_i == end_tile_i and tile_j == end_tile_j) or t > 1.0:
+            return None
+
+        if t_max_x < t_max_y:
+            tile_i += step_i
+            t = t_max_x
+            t_max_x += t_delta_x
+        else:
+            tile_j += step_j
+            t = t_max_y
+            t_max_y += t_delta_y
+
+
+def has_line_of_sight(
+    grid: TileGrid[T],
+    start: pygame.Vector2 | tuple[float, float],
+    end: pygame.Vector2 | tuple[float, float],
+    *blocking_values: T,
+) -> bool:
+    return cast_ray(grid, start, end, *blocking_values) is None
@@ -0,0 +1,73 @@
+import enum
+import pygame
+
+BlitSequence = list[tuple[pygame.Surface, pygame.Rect | tuple[int, int]]]
+
+
+class RenderLayer(enum.IntEnum):
+    # Drawn in this order, and in submission order within a layer. The order rooms
+    # drew actors in before they were queued: monsters and their lasers come last,
+    # over the cursor and the hud.
+    HERO = enum.auto()
+    FIREBALL = enum.auto()
+    OVERLAY = enum.auto()
+    HUD = enum.auto()
+    MONSTERS = enum.auto()
+    LASERS = enum.auto()
+
+
+def blit_all(target: pygame.Surface, blit_sequence: BlitSequence) -> None:
+    # One call into pygame for the whole sequence, fblits being the fastest when the
+    # pygame flavour has it
+    if fblits := getattr(target, "fblits", None):
+        fblits(blit_sequence)
+    else:
+        target.blits(blit_sequence, doreturn=False)
+
+
+class RenderQueue:
+    # Sprites submitted during a frame, blitted all at once when the frame is done
+    # instead of one blit call each. Rect outlines, such as cursors and debug boxes,
+    # are drawn over the sprites of their layer.
+
+    def __init__(self) -> None:
+        self.blit_sequences: dict[RenderLayer, BlitSequence] = {
+            layer: [] for layer in RenderLayer
+        }
+        self.outlines: dict[RenderLayer, list[tuple[str, pygame.Rect, int]]] = {
+            layer: [] for layer in RenderLayer
+        }
+        self.num_blits = 0
+
+    def submit(
+        self, surface: pygame.Surface, rect: pygame.Rect, layer: RenderLayer
+    ) -> pygame.Rect:
+        self.blit_sequences[layer].append((surface, rect))
+        return rect
+
+    def submit_outline(
+        self, color: str, rect: pygame.Rect, width: int, layer: RenderLayer
+    ) -> pygame.Rect:
+        self.outlines[layer].append((color, rect, width))
+        return rect
+
+    def flush(self, target: pygame.Surface) -> None:
+        self.num_blits = 0
+        for layer in RenderLayer:
+            if blit_sequence := self.blit_sequences[layer]:
+                blit_all(target, blit_sequence)
+                self.num_blits += len(blit_sequence)
+                blit_sequence.clear()
+
+            if outlines := self.outlines[layer]:
+                for color, rect, width in outlines:
+                    pygame.draw.rect(target, color, rect, width)
+                outlines.clear()
+
+    def clear(self) -> None:
+        for layer in RenderLayer:
+            self.blit_sequences[layer].clear()
+            self.outlines[layer].clear()
+
+
+render_queue = RenderQueue()
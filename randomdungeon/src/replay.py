@@ -0,0 +1,83 @@
+import json
+import pygame
+
+from pathlib import Path
+
+REPLAY_FORMAT_VERSION = 1
+
+# Only the events rooms react to are recorded, along with the attributes they read
+REPLAY_EVENT_ATTRIBUTES = {
+    pygame.QUIT: (),
+    pygame.KEYDOWN: ("key", "mod"),
+    pygame.MOUSEMOTION: ("pos", "rel", "buttons"),
+    pygame.MOUSEBUTTONDOWN: ("pos", "button"),
+}
+
+
+class Replay:
+    # Input events keyed by the simulation step they were read before. Together with
+    # the seed of the run, this is enough to re-drive the engine step for step. Files
+    # are JSON lines: a header, then one [step, event type, attributes] per event.
+
+    def __init__(self, seed: int) -> None:
+        self.seed = seed
+        self.num_sim_steps = 0
+        self.events: dict[int, list[pygame.event.Event]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(events) for events in self.events.values())
+
+    def record(self, sim_step: int, events: list[pygame.event.Event]) -> None:
+        self.num_sim_steps = max(self.num_sim_steps, sim_step)
+        recorded_events = [
+            event for event in events if event.type in REPLAY_EVENT_ATTRIBUTES
+        ]
+        if recorded_events:
+            self.events.setdefault(sim_step, []).extend(recorded_events)
+
+    def events_at(self, sim_step: int) -> list[pygame.event.Event]:
+        return self.events.get(sim_step, [])
+
+    def is_finished(self, sim_step: int) -> bool:
+        return sim_step >= self.num_sim_steps
+
+    def save(self, path: Path | str) -> None:
+        with open(path, "w") as replay_file:
+            header = {
+                "version": REPLAY_FORMAT_VERSION,
+                "seed": self.seed,
+                "num_sim_steps": self.num_sim_steps,
+            }
+            replay_file.write(json.dumps(header) + "\n")
+
+            for sim_step, events in sorted(self.events.items()):
+                for event in events:
+                    attributes = {
+                        name: getattr(event, name)
+                        for name in REPLAY_EVENT_ATTRIBUTES[event.type]
+                    }
+                    replay_file.write(
+                        json.dumps(
+                            [sim_step, event.type, attributes], separators=(",", ":")
+                        )
+                        + "\n"
+                    )
+
+    @classmethod
+    def load(cls, path: Path | str) -> "Replay":
+        with open(path) as replay_file:
+            header = json.loads(replay_file.readline())
+            if header.get("version") != REPLAY_FORMAT_VERSION:
+                raise ValueError(f"Unsupported replay version: {header.get('version')}")
+
+            replay = cls(header["seed"])
+            for line in replay_file:
+                sim_step, event_type, attributes = json.loads(line)
+                for name, value in attributes.items():
+                    # JSON has no tuples, but positions are compared and indexed as such
+                    if isinstance(value, list):
+                        attributes[name] = tuple(value)
+                replay.record(sim_step, [pygame.event.Event(event_type, attributes)])
+
+            replay.num_sim_steps = header["num_sim_steps"]
+            return replay
@@ -1,25 +1,31 @@
-import enum
 import pygame
 import random
 
 from pygame.event import Event
 
 from actors import *
+from audio import *
+from camera import *
+from dungeon import *
+from entities import *
 from game import *
 from globals import *
+from grids import *
+from pathfinding import *
+from profiler import *
+from raycast import *
+from render import *
+from scheduler import *
 from utils import *
 
 
-class TileType(enum.Enum):
-    FLOOR = enum.auto()
-    WALL = enum.auto()
-    CLOSED_DOOR = enum.auto()
-    OPEN_DOOR = enum.auto()
-
-
 class Room:
-    def __init__(self, game: Game) -> None:
+    def __init__(self, game: Game, seed: int | None = None) -> None:
         self.game = game
+        # Every room draws from its own generator, seeded from the run by default
+        self.random = random.Random(
+            game.random.getrandbits(64) if seed is None else seed
+        )
 
     def enter(self) -> None:
         pass
@@ -36,26 +42,84 @@ class Room:
     def animate(self, time_delta_in_secs: float) -> None:
         pass
 
-    def render(self) -> None:
-        pass
+    def render(self, interpolation: float = 1.0) -> list[pygame.Rect] | None:
+        # Rooms that only redraw part of the screen return the areas to present,
+        # otherwise the whole display is flipped
+        return None
 
 
 class DungeonRoom(Room):
-    def __init__(self, game: Game) -> None:
-        super().__init__(game)
+    def __init__(self, game: Game, seed: int | None = None) -> None:
+        super().__init__(game, seed)
 
         self.are_open_doors = False
 
-        self.tile_surfs: dict[str, pygame.Surface] = {}
+        self.tile_surfs: dict[TileSprite, pygame.Surface] = {}
         self.__load_tiles()
 
-        self.map_width_in_tiles, self.map_height_in_tiles = window_size_in_tiles()
-        self.tile_map, self.room_map = self.__generate_maps()
+        self.map_width_in_tiles = game.map_width_in_tiles
+        self.map_height_in_tiles = game.map_height_in_tiles
+        map_size_in_tiles = (self.map_width_in_tiles, self.map_height_in_tiles)
+        self.tile_map = TileGrid(TileSprite, map_size_in_tiles, TileSprite.EMPTY)
+        self.room_map = TileGrid(TileType, map_size_in_tiles, TileType.WALL)
+
+        # Only the chunks around the spawn are generated upfront, the others once the
+        # hero gets close to them
+        self.dungeon = DungeonGenerator(self.random.getrandbits(64), map_size_in_tiles)
+        self.generated_chunks: set[tuple[int, int]] = set()
+        self.exits: list[tuple[int, int]] = []
+        self.door_tile_idxs: set[tuple[int, int]] = set()
+        self.spawn_tile_idx = pygame.Vector2(self.dungeon.spawn_tile_idx())
+        self.entrance_tile_idx = pygame.Vector2(self.dungeon.entrance_tile_idx())
+        self.are_doors_open_in_tile_map: bool | None = None
+        for chunk_idx in self.dungeon.chunks_around(
+            self.spawn_tile_idx, DUNGEON_CHUNK_GENERATION_RADIUS
+        ):
+            self.__generate_chunk(chunk_idx)
+
+        tile_width, tile_height = tile_size()
+        world_size = (
+            self.map_width_in_tiles * tile_width,
+            self.map_height_in_tiles * tile_height,
+        )
+        # The camera follows the hero step by step, as clicks are relative to it and
+        # must land on the same tiles whether the room is rendered or not. Rendering
+        # has its own camera, following the hero between steps.
+        self.camera = Camera(world_size)
+        self.render_camera = Camera(world_size)
+
+        # Static layer of the tiles around the viewport, rebuilt only when the tile map
+        # changes and scrolled along with the camera
+        self.background_tiles = pygame.Rect((0, 0), viewport_size_in_tiles())
+        self.background_surf = pygame.Surface(
+            (
+                self.background_tiles.width * tile_width,
+                self.background_tiles.height * tile_height,
+            )
+        )
+        # Top left corner of each tile in the background, by offset from its first tile
+        self.background_tile_positions = [
+            [
+                (i * tile_width, j * tile_height)
+                for i in range(self.background_tiles.width)
+            ]
+            for j in range(self.background_tiles.height)
+        ]
+        self.is_background_dirty = True
+        self.previous_camera_top_left: tuple[int, int] | None = None
+        self.__update_doors()
+
+        self.render_dirty_rects = RENDER_DIRTY_RECTS and not (
+            DEBUG_RENDER_CHARACTER_TILES or DEBUG_RENDER_COLLISION_BOX
+        )
+        self.previous_dirty_rects: list[pygame.Rect] = []
 
         self.hero = Hero(self.game)
 
         self.fireball: Fireball | None = None
 
+        # Mouse position on the screen, the cursor is on the tile below it in the world
+        self.mouse_position = pygame.Vector2()
         self.mouse_tile_cursor = TileCursor()
         self.mouse_tile_cursor.color = "white"
         self.mouse_tile_cursor.thickness = 5
@@ -63,142 +127,51 @@ class DungeonRoom(Room):
         self.life_indicator = LifeIndicator(self.game)
 
     def __load_tiles(self) -> None:
-        self.tile_surfs["wall_parapet_top"] = load_tile("0026")
-        self.tile_surfs["wall_parapet_bottom"] = load_tile("0002")
-
-        self.tile_surfs["wall_parapet_top_left"] = load_tile("0004")
-        self.tile_surfs["wall_parapet_top_right"] = load_tile("0005")
-        self.tile_surfs["wall_parapet_bottom_left"] = load_tile("0016")
-        self.tile_surfs["wall_parapet_bottom_right"] = load_tile("0017")
-
-        self.tile_surfs["wall_parapet_top_left_corner"] = load_tile("0027")
-        self.tile_surfs["wall_parapet_top_right_corner"] = load_tile("0025")
-        self.tile_surfs["wall_parapet_bottom_left_corner"] = load_tile("0003")
-        self.tile_surfs["wall_parapet_bottom_right_corner"] = load_tile("0001")
-
-        self.tile_surfs["wall_front"] = load_tile("0014")
-        self.tile_surfs["wall_left"] = load_tile("0013")
-        self.tile_surfs["wall_right"] = load_tile("0015")
-
-        self.tile_surfs["floor"] = load_tile("0048")
-
-        self.tile_surfs["corridor_left"] = load_tile("0010")
-        self.tile_surfs["corridor_right"] = load_tile("0011")
-
-        self.tile_surfs["door_closed_left"] = load_tile("0046")
-        self.tile_surfs["door_closed_right"] = load_tile("0047")
-        self.tile_surfs["door_open_left"] = load_tile("0034")
-        self.tile_surfs["door_open_right"] = load_tile("0035")
+        for tile_sprite in TileSprite:
+            if tile_sprite in DUNGEON_TILE_FILE_IDXS:
+                self.tile_surfs[tile_sprite] = load_tile(
+                    DUNGEON_TILE_FILE_IDXS[tile_sprite]
+                )
+
+    def __generate_chunk(self, chunk_idx: tuple[int, int]) -> pygame.Rect:
+        # Returns the tiles whose sprites may have changed
+        exits = self.dungeon.generate_chunk(self.room_map, chunk_idx)
+        self.generated_chunks.add(chunk_idx)
+        for exit_i, exit_j in exits:
+            self.exits.append((exit_i, exit_j))
+            self.door_tile_idxs.update(((exit_i, exit_j), (exit_i + 1, exit_j)))
+
+        # Walls around the chunk depend on its floor, up to two tiles above it
+        chunk_rect = self.dungeon.chunk_rect(chunk_idx)
+        tiles = pygame.Rect(
+            chunk_rect.left - 1,
+            chunk_rect.top - 2,
+            chunk_rect.width + 2,
+            chunk_rect.height + 3,
+        )
+        autotile(self.room_map, self.tile_map, tiles)
+        self.__render_doors()
+        return tiles
+
+    def __generate_chunks_around(self, tile_idx: pygame.Vector2) -> None:
+        num_generated_chunks = 0
+        for chunk_idx in self.dungeon.chunks_around(
+            tile_idx, DUNGEON_CHUNK_GENERATION_RADIUS
+        ):
+            if chunk_idx in self.generated_chunks:
+                continue
+            if num_generated_chunks == DUNGEON_MAX_CHUNKS_PER_STEP:
+                break
 
-    def __generate_maps(
-        self,
-    ) -> tuple[list[list[pygame.Surface | None]], list[list[TileType | None]]]:
-        tile_map: list[list[pygame.Surface | None]] = [
-            [None] * self.map_width_in_tiles for _ in range(self.map_height_in_tiles)
-        ]
-        room_map: list[list[TileType | None]] = [
-            [None] * self.map_width_in_tiles for _ in range(self.map_height_in_tiles)
-        ]
+            self._on_chunk_generated(self.__generate_chunk(chunk_idx))
+            num_generated_chunks += 1
 
-        # Render floor
-        for j in range(self.map_height_in_tiles):
-            for i in range(self.map_width_in_tiles):
-                tile_map[j][i] = self.tile_surfs["floor"]
-                room_map[j][i] = TileType.FLOOR
-
-        # Render walls
-        for j in range(self.map_height_in_tiles):
-            for i in range(self.map_width_in_tiles):
-                if j == 0:
-                    if i == 0:
-                        tile_map[j][i] = self.tile_surfs[
-                            "wall_parapet_bottom_right_corner"
-                        ]
-                        room_map[j][i] = TileType.WALL
-                    elif i == self.map_width_in_tiles - 1:
-                        tile_map[j][i] = self.tile_surfs[
-                            "wall_parapet_bottom_left_corner"
-                        ]
-                        room_map[j][i] = TileType.WALL
-                    else:
-                        tile_map[j][i] = self.tile_surfs["wall_parapet_bottom"]
-                        room_map[j][i] = TileType.WALL
-
-                elif j == 1:
-                    if i == 0:
-                        tile_map[j][i] = self.tile_surfs["wall_left"]
-                        room_map[j][i] = TileType.WALL
-                    elif i == self.map_width_in_tiles - 1:
-                        tile_map[j][i] = self.tile_surfs["wall_right"]
-                        room_map[j][i] = TileType.WALL
-                    else:
-                        tile_map[j][i] = self.tile_surfs["wall_front"]
-                        room_map[j][i] = TileType.WALL
-
-                elif j == self.map_height_in_tiles - 1:
-                    if i == 0:
-                        tile_map[j][i] = self.tile_surfs[
-                            "wall_parapet_top_right_corner"
-                        ]
-                        room_map[j][i] = TileType.WALL
-                    elif i == self.map_width_in_tiles - 1:
-                        tile_map[j][i] = self.tile_surfs["wall_parapet_top_left_corner"]
-                        room_map[j][i] = TileType.WALL
-                    else:
-                        tile_map[j][i] = self.tile_surfs["wall_parapet_top"]
-                        room_map[j][i] = TileType.WALL
-
-                elif i == 0:
-                    tile_map[j][i] = self.tile_surfs["wall_left"]
-                    room_map[j][i] = TileType.WALL
-                elif i == self.map_width_in_tiles - 1:
-                    tile_map[j][i] = self.tile_surfs["wall_right"]
-                    room_map[j][i] = TileType.WALL
-
-        # Render exits
-        horizontal_exit_left_i = self.map_width_in_tiles // 2 - 1
-        tile_map[1][horizontal_exit_left_i] = self.tile_surfs["corridor_left"]
-        tile_map[1][horizontal_exit_left_i + 1] = self.tile_surfs["corridor_right"]
-
-        # vertical_exit_top_j = self.map_height_in_tiles // 2 - 2
-        # tile_map[vertical_exit_top_j][0] = self.tile_surfs["wall_parapet_bottom_right"]
-        # tile_map[vertical_exit_top_j + 1][0] = self.tile_surfs["wall_front"]
-        # tile_map[vertical_exit_top_j + 2][0] = self.tile_surfs["floor"]
-        # room_map[vertical_exit_top_j + 2][0] = TileType.FLOOR
-        # tile_map[vertical_exit_top_j + 3][0] = self.tile_surfs["wall_parapet_top_right"]
-
-        # tile_map[vertical_exit_top_j][self.map_width_in_tiles - 1] = self.tile_surfs[
-        #     "wall_parapet_bottom_left"
-        # ]
-        # tile_map[vertical_exit_top_j + 1][self.map_width_in_tiles - 1] = (
-        #     self.tile_surfs["wall_front"]
-        # )
-        # tile_map[vertical_exit_top_j + 2][self.map_width_in_tiles - 1] = (
-        #     self.tile_surfs["floor"]
-        # )
-        # room_map[vertical_exit_top_j + 2][self.map_width_in_tiles - 1] = TileType.FLOOR
-        # tile_map[vertical_exit_top_j + 3][self.map_width_in_tiles - 1] = (
-        #     self.tile_surfs["wall_parapet_top_left"]
-        # )
-
-        tile_map[self.map_height_in_tiles - 1][horizontal_exit_left_i - 1] = (
-            self.tile_surfs["wall_parapet_top_right"]
-        )
-        tile_map[self.map_height_in_tiles - 1][horizontal_exit_left_i] = (
-            self.tile_surfs["floor"]
-        )
-        tile_map[self.map_height_in_tiles - 1][horizontal_exit_left_i + 1] = (
-            self.tile_surfs["floor"]
-        )
-        room_map[self.map_height_in_tiles - 1][horizontal_exit_left_i] = TileType.FLOOR
-        room_map[self.map_height_in_tiles - 1][
-            horizontal_exit_left_i + 1
-        ] = TileType.FLOOR
-        tile_map[self.map_height_in_tiles - 1][horizontal_exit_left_i + 2] = (
-            self.tile_surfs["wall_parapet_top_left"]
+    def _on_chunk_generated(self, tiles: pygame.Rect) -> None:
+        self.game.set_terrain_from(
+            self.room_map, {tile: game_object_type(tile) for tile in TileType}, tiles
         )
-
-        return tile_map, room_map
+        if tiles.colliderect(self.background_tiles):
+            self.is_background_dirty = True
 
     def enter(self) -> None:
         self.hero.next_tile_idx = self.hero.current_tile_idx
@@ -207,152 +180,389 @@ class DungeonRoom(Room):
 
         self.hero_attack_countdown_in_secs = 0.0
 
+        self.mouse_position = pygame.Vector2(pygame.mouse.get_pos())
+        self.camera.follow(self.hero.position)
+        self.render_camera.follow(self.hero.position)
+
+        self._update_game_map()
+
+    def exit(self) -> None:
+        super().exit()
+        self._release_fireball()
+
     def read_events(self, events: list[pygame.event.Event]) -> None:
         super().read_events(events)
-        hover_mouse_position = pygame.mouse.get_pos()
-        self.mouse_tile_cursor.position = pygame.Vector2(hover_mouse_position)
+        # Positions come from the events rather than from polling the mouse, so that
+        # scripted input can drive the room without a real pointer
+        for event in events:
+            if event.type == pygame.MOUSEMOTION:
+                self.mouse_position = pygame.Vector2(event.pos)
 
     def update(self, time_delta_in_secs: float) -> None:
         super().update(time_delta_in_secs)
 
-        self.__update_doors()
-        self._update_game_map()
+        if len(self.generated_chunks) < self.dungeon.total_num_chunks:
+            with profiler.room_phase("chunks.generate"):
+                self.__generate_chunks_around(self.hero.current_tile_idx)
 
-        self.hero.update(time_delta_in_secs)
+        if self.__update_doors():
+            for door_tile_idx in self.door_tile_idxs:
+                self.game.set_terrain_at(
+                    door_tile_idx, game_object_type(self.room_at(door_tile_idx))
+                )
+
+        with profiler.room_phase("hero.update"):
+            self._update_character(self.hero, GameObjectType.HERO, time_delta_in_secs)
 
         if self.fireball:
             if (
-                not is_valid_position(self.fireball.position)
+                not self.camera.is_in_world(self.fireball.position)
                 or self.__fireball_collision_obstacle()
             ):
-                self.fireball = None
+                self._release_fireball()
+
+    def __update_doors(self) -> bool:
+        if self.are_open_doors == self.are_doors_open_in_tile_map:
+            return False
 
-    def __update_doors(self) -> None:
-        if self.are_open_doors:
-            door_left_tile_surf = self.tile_surfs["door_open_left"]
-            door_right_tile_surf = self.tile_surfs["door_open_right"]
+        self.are_doors_open_in_tile_map = self.are_open_doors
+        self.is_background_dirty = True
+        self.__render_doors()
+        return True
+
+    def __render_doors(self) -> None:
+        if self.are_doors_open_in_tile_map:
+            door_left_tile_sprite = TileSprite.DOOR_OPEN_LEFT
+            door_right_tile_sprite = TileSprite.DOOR_OPEN_RIGHT
             door_tile_type = TileType.OPEN_DOOR
         else:
-            door_left_tile_surf = self.tile_surfs["door_closed_left"]
-            door_right_tile_surf = self.tile_surfs["door_closed_right"]
+            door_left_tile_sprite = TileSprite.DOOR_CLOSED_LEFT
+            door_right_tile_sprite = TileSprite.DOOR_CLOSED_RIGHT
             door_tile_type = TileType.CLOSED_DOOR
 
-        self.tile_map[int(self.game.door_left_tile_idx[1])][
-            int(self.game.door_left_tile_idx[0])
-        ] = door_left_tile_surf
-        self.room_map[int(self.game.door_left_tile_idx[1])][
-            int(self.game.door_left_tile_idx[0])
-        ] = door_tile_type
+        for exit_i, exit_j in self.exits:
+            self.tile_map[exit_i, exit_j] = door_left_tile_sprite
+            self.room_map[exit_i, exit_j] = door_tile_type
+
+            self.tile_map[exit_i + 1, exit_j] = door_right_tile_sprite
+            self.room_map[exit_i + 1, exit_j] = door_tile_type
 
-        self.tile_map[int(self.game.door_right_tile_idx[1])][
-            int(self.game.door_right_tile_idx[0])
-        ] = door_right_tile_surf
-        self.room_map[int(self.game.door_right_tile_idx[1])][
-            int(self.game.door_right_tile_idx[0])
-        ] = door_tile_type
+    def is_door_tile(self, tile_idx: pygame.Vector2 | tuple[int, int]) -> bool:
+        return (int(tile_idx[0]), int(tile_idx[1])) in self.door_tile_idxs
+
+    def room_at(self, tile_idx: pygame.Vector2 | tuple[int, int]) -> TileType:
+        return self.room_map[tile_idx]
 
     def _update_game_map(self) -> None:
-        for j, tile_row in enumerate(self.room_map):
-            for i, tile in enumerate(tile_row):
-                match tile:
-                    case TileType.FLOOR:
-                        object_type = GameObjectType.FLOOR
-                    case TileType.OPEN_DOOR:
-                        object_type = GameObjectType.OPEN_DOOR
-                    case _:
-                        object_type = GameObjectType.OBSTACLE
-                self.game.map[j][i] = object_type
-
-        self.game.map[int(self.hero.current_tile_idx.y)][
-            int(self.hero.current_tile_idx.x)
-        ] = GameObjectType.HERO
+        # Full rebuild, only needed when entering the room. Afterwards the game map is
+        # kept up to date incrementally as characters change tiles and doors open.
+        self.game.set_terrain_from(
+            self.room_map, {tile: game_object_type(tile) for tile in TileType}
+        )
+
+        self.game.clear_occupants()
+        self._add_character_to_game_map(self.hero, GameObjectType.HERO)
+
+    def _update_character(
+        self,
+        character: Character,
+        object_type: GameObjectType,
+        time_delta_in_secs: float,
+    ) -> None:
+        previous_current_tile_idx = character.current_tile_idx
+        previous_next_tile_idx = character.next_tile_idx
+        character.update(time_delta_in_secs)
+        # Tile indices are replaced rather than modified when characters change tiles,
+        # which most steps do not, so there is no need to build the sets of tiles
+        if (
+            character.current_tile_idx is previous_current_tile_idx
+            and character.next_tile_idx is previous_next_tile_idx
+        ):
+            return
+
+        previous_tile_idxs = self.__occupied_tile_idxs(
+            previous_current_tile_idx, previous_next_tile_idx
+        )
+        tile_idxs = self.__occupied_tile_idxs(
+            character.current_tile_idx, character.next_tile_idx
+        )
+        if tile_idxs != previous_tile_idxs:
+            for tile_idx in previous_tile_idxs:
+                self.game.remove_occupant(tile_idx, object_type)
+            for tile_idx in tile_idxs:
+                self.game.add_occupant(tile_idx, object_type)
+
+    def _add_character_to_game_map(
+        self, character: Character, object_type: GameObjectType
+    ) -> None:
+        for tile_idx in self.__occupied_tile_idxs(
+            character.current_tile_idx, character.next_tile_idx
+        ):
+            self.game.add_occupant(tile_idx, object_type)
+
+    def _remove_character_from_game_map(
+        self, character: Character, object_type: GameObjectType
+    ) -> None:
+        for tile_idx in self.__occupied_tile_idxs(
+            character.current_tile_idx, character.next_tile_idx
+        ):
+            self.game.remove_occupant(tile_idx, object_type)
+
+    def __occupied_tile_idxs(
+        self,
+        current_tile_idx: pygame.Vector2 | tuple[int, int],
+        next_tile_idx: pygame.Vector2 | tuple[int, int],
+    ) -> set[tuple[int, int]]:
+        # Moving characters also reserve the tile they are heading to, so that no
+        # two characters step into the same tile
+        return {
+            (int(current_tile_idx[0]), int(current_tile_idx[1])),
+            (int(next_tile_idx[0]), int(next_tile_idx[1])),
+        }
+
+    def _release_fireball(self) -> None:
+        if self.fireball:
+            fireball_pool.release(self.fireball)
+            self.fireball = None
 
     def __fireball_collision_obstacle(self) -> bool:
+        # Swept along the whole step, so that the fireball cannot go through thin walls
+        # whatever its speed and the time step
         if self.fireball:
-            fireball_tile = tile_idx(self.fireball.position)
-            return self.game.object_at(fireball_tile) == GameObjectType.OBSTACLE
+            previous_position = self.fireball.previous_position
+            return not has_line_of_sight(
+                self.game.map,
+                (
+                    self.fireball.position
+                    if previous_position is None
+                    else previous_position
+                ),
+                self.fireball.position,
+                GameObjectType.OBSTACLE,
+            )
         return False
 
     def animate(self, time_delta_in_secs: float) -> None:
         super().animate(time_delta_in_secs)
 
         self.hero.animate(time_delta_in_secs)
+        self.camera.follow(self.hero.position)
         if self.fireball:
             self.fireball.animate(time_delta_in_secs)
-        self.mouse_tile_cursor.animate()
 
-    def render(self) -> None:
-        super().render()
+    def render(self, interpolation: float = 1.0) -> list[pygame.Rect] | None:
+        super().render(interpolation)
+
+        screen = pygame.display.get_surface()
+        self.render_camera.follow(
+            interpolate_position(
+                self.hero.previous_position, self.hero.position, interpolation
+            )
+        )
 
-        self.__render_tile_map()
+        with profiler.room_phase("background.render"):
+            is_background_changed = self.__update_background()
 
-        self.hero.render()
+        # Any scrolling moves the whole screen
+        is_full_redraw = (
+            not self.render_dirty_rects
+            or is_background_changed
+            or self.render_camera.rect.topleft != self.previous_camera_top_left
+        )
+        self.previous_camera_top_left = self.render_camera.rect.topleft
+
+        tile_width, tile_height = tile_size()
+        background_offset = (
+            self.render_camera.rect.left - self.background_tiles.left * tile_width,
+            self.render_camera.rect.top - self.background_tiles.top * tile_height,
+        )
+        if is_full_redraw:
+            screen.blit(
+                self.background_surf,
+                (0, 0),
+                pygame.Rect(background_offset, self.render_camera.rect.size),
+            )
+        else:
+            screen.blits(
+                [
+                    (
+                        self.background_surf,
+                        dirty_rect,
+                        dirty_rect.move(background_offset),
+                    )
+                    for dirty_rect in self.previous_dirty_rects
+                ],
+                doreturn=False,
+            )
+
+        with profiler.room_phase("actors.render"):
+            dirty_rects = self._render_actors(interpolation)
+            render_queue.flush(screen)
+
+        # Areas drawn on the previous frame must be presented again once restored
+        presented_rects = self.previous_dirty_rects + dirty_rects
+        self.previous_dirty_rects = dirty_rects
+
+        return None if is_full_redraw else presented_rects
+
+    def _render_actors(self, interpolation: float) -> list[pygame.Rect]:
+        dirty_rects = [self.hero.render(self.render_camera, interpolation)]
 
         if self.fireball:
-            self.fireball.render()
+            dirty_rects.append(self.fireball.render(self.render_camera, interpolation))
 
-        self.mouse_tile_cursor.render()
+        # The hovered tile is the one under the mouse in the frame drawn, not in the
+        # last simulation step
+        self.mouse_tile_cursor.position = self.render_camera.to_world(
+            self.mouse_position
+        )
+        self.mouse_tile_cursor.animate()
+        dirty_rects.append(self.mouse_tile_cursor.render(self.render_camera))
 
-        self.life_indicator.render()
+        dirty_rects.append(self.life_indicator.render())
 
-    def __render_tile_map(self) -> None:
-        screen = pygame.display.get_surface()
+        return dirty_rects
 
-        for j, tile_row in enumerate(self.tile_map):
-            for i, tile_surf in enumerate(tile_row):
-                if tile_surf:
-                    tile_rect = tile_surf.get_rect(topleft=tile_top_left((i, j)))
-                    screen.blit(tile_surf, tile_rect)
+    def __update_background(self) -> bool:
+        background_tiles = pygame.Rect(
+            self.render_camera.visible_tiles().topleft, self.background_tiles.size
+        )
+        if self.is_background_dirty or not background_tiles.colliderect(
+            self.background_tiles
+        ):
+            self.background_tiles = background_tiles
+            self.__render_tile_map()
+            self.is_background_dirty = False
+            return True
+
+        offset_i = background_tiles.left - self.background_tiles.left
+        offset_j = background_tiles.top - self.background_tiles.top
+        if not offset_i and not offset_j:
+            return False
+
+        # Keep the tiles still in view and only draw the ones coming into view
+        tile_width, tile_height = tile_size()
+        self.background_surf.scroll(-offset_i * tile_width, -offset_j * tile_height)
+        self.background_tiles = background_tiles
+        if offset_i:
+            left = (
+                background_tiles.right - offset_i
+                if offset_i > 0
+                else background_tiles.left
+            )
+            self.__render_tile_map(
+                pygame.Rect(
+                    left, background_tiles.top, abs(offset_i), background_tiles.height
+                )
+            )
+        if offset_j:
+            top = (
+                background_tiles.bottom - offset_j
+                if offset_j > 0
+                else background_tiles.top
+            )
+            self.__render_tile_map(
+                pygame.Rect(
+                    background_tiles.left, top, background_tiles.width, abs(offset_j)
+                )
+            )
+        return True
+
+    def __render_tile_map(self, tiles: pygame.Rect | None = None) -> None:
+        # Tiles are drawn relatively to the top left tile of the background
+        tiles = tiles or self.background_tiles
+        tile_width, tile_height = tile_size()
+        self.background_surf.fill(
+            BACKGROUND_COLOR,
+            pygame.Rect(
+                (tiles.left - self.background_tiles.left) * tile_width,
+                (tiles.top - self.background_tiles.top) * tile_height,
+                tiles.width * tile_width,
+                tiles.height * tile_height,
+            ),
+        )
 
-                if DEBUG_RENDER_TILE_BORDERS:
-                    pygame.draw.rect(screen, "black", tile_rect, 1)
+        positions = self.background_tile_positions
+        left, top = self.background_tiles.topleft
+        blit_all(
+            self.background_surf,
+            [
+                (tile_surf, positions[j - top][i - left])
+                for (i, j), tile_sprite in self.tile_map.items_in_rect(tiles)
+                if (tile_surf := self.tile_surfs.get(tile_sprite))
+            ],
+        )
+
+        if DEBUG_RENDER_TILE_BORDERS:
+            for (i, j), _ in self.tile_map.items_in_rect(tiles):
+                pygame.draw.rect(
+                    self.background_surf,
+                    "black",
+                    (positions[j - top][i - left], (tile_width, tile_height)),
+                    1,
+                )
 
 
 class MonsterRoom(DungeonRoom):
-    def __init__(self, game: Game, num_monsters: int) -> None:
-        super().__init__(game)
+    def __init__(self, game: Game, num_monsters: int, seed: int | None = None) -> None:
+        super().__init__(game, seed)
+
+        # Shared by all monsters and recomputed only when the hero changes tiles
+        self.hero_flow_field = FlowField(
+            (self.map_width_in_tiles, self.map_height_in_tiles)
+        )
 
-        self.monsters: list[Monster] = []
+        tile_width, tile_height = tile_size()
+        self.ai_scheduler: AIScheduler[Monster] = AIScheduler(AI_MAX_DECISIONS_PER_STEP)
+        self.monsters = CharacterStore(
+            num_monsters,
+            (
+                int(tile_width * CHARACTER_COLLISION_BOX_SCALE),
+                int(tile_height * CHARACTER_COLLISION_BOX_SCALE),
+            ),
+        )
         self.__generate_monsters(num_monsters)
 
-        self.lasers: list[Laser] = []
+        self.lasers = ProjectileStore(
+            LASER_STORE_CAPACITY,
+            LASER_SPEED,
+            (
+                int(tile_width * LASER_SPRITE_SCALE),
+                int(tile_height * LASER_SPRITE_SCALE),
+            ),
+        )
         self.laser_countdown_in_secs = 5.0
 
     def __generate_monsters(self, num_monsters):
-        super()._update_game_map()
+        # Monsters start on distinct floor tiles of the chunks generated so far, away
+        # from where the hero appears
+        free_tile_idxs = TileIndex(self.room_map.tiles_where(TileType.FLOOR))
+        for hero_tile_idx in (self.spawn_tile_idx, self.entrance_tile_idx):
+            free_tile_idxs.discard((int(hero_tile_idx[0]), int(hero_tile_idx[1])))
 
         for _ in range(num_monsters):
-            monster = MonsterCrab(self.game)
-            monster.current_tile_idx = self.__random_empty_floor_tile()
+            tile_idx = free_tile_idxs.pop_random_tile(self.random)
+            if tile_idx is None:
+                break
+
+            monster = MonsterCrab(self.game, self.random)
+            if not self.monsters.add(
+                monster, tile_center(tile_idx), HERO_SPEED, MONSTER_LIFE_POINTS
+            ):
+                break
+
+            monster.current_tile_idx = pygame.Vector2(tile_idx)
             monster.next_tile_idx = monster.current_tile_idx
-            monster.position = tile_center(monster.current_tile_idx)
-            monster.collision_box.center = monster.position
-            self.monsters.append(monster)
-
-            self.game.map[int(monster.current_tile_idx.y)][
-                int(monster.current_tile_idx.x)
-            ] = GameObjectType.MONSTER
-
-    def __random_empty_floor_tile(self):
-        tile_idx = pygame.Vector2(-1.0, -1.0)
-        while not (
-            is_valid_tile(tile_idx)
-            and self.game.object_at(tile_idx) == GameObjectType.FLOOR
-        ):
-            tile_idx = pygame.Vector2(
-                random.randint(1, 14),
-                random.randint(2, 10),
-            )
-        return tile_idx
+            monster.flow_field = self.hero_flow_field
+            self.ai_scheduler.schedule(monster, monster.countdown_in_secs)
 
     def read_events(self, events: list[pygame.event.Event]) -> None:
         super().read_events(events)
         for event in events:
             if event.type == pygame.MOUSEBUTTONDOWN:
-                pressed_buttons = pygame.mouse.get_pressed()
-                if pressed_buttons[0]:
-                    pressed_tile = tile_idx(pygame.mouse.get_pos())
-                    if is_valid_tile(pressed_tile):
+                if event.button == pygame.BUTTON_LEFT:
+                    pressed_tile = tile_idx(self.camera.to_world(event.pos))
+                    if self.game.map.is_valid_tile(pressed_tile):
                         if monster := self.__monster_on_tile(pressed_tile):
                             if not self.fireball:
                                 self.__shoot_fireball(monster)
@@ -366,8 +576,16 @@ class MonsterRoom(DungeonRoom):
         return None
 
     def __shoot_fireball(self, monster: Monster):
-        self.fireball = Fireball()
-        self.fireball.direction = (monster.position - self.hero.position).normalize()
+        direction = monster.position - self.hero.position
+        if not direction:
+            # Monster right on top of the hero, there is no way to aim at it
+            return
+
+        self.fireball = fireball_pool.acquire()
+        if not self.fireball:
+            return
+
+        self.fireball.direction = direction.normalize()
         self.fireball.position = (
             self.hero.position + self.fireball.direction * TILE_RADIUS
         )
@@ -375,88 +593,112 @@ class MonsterRoom(DungeonRoom):
     def update(self, time_delta_in_secs: float) -> None:
         super().update(time_delta_in_secs)
 
-        if self.fireball:
-            if hit_monster := self.__fireball_collision__monster():
-                hit_monster.life_points -= 1
-                self.fireball = None
+        with profiler.room_phase("flow_field.update"):
+            if not self.hero_flow_field.goal_tile_idx or not are_same_tile(
+                self.hero_flow_field.goal_tile_idx, self.hero.current_tile_idx
+            ):
+                self.hero_flow_field.update(self.game, self.hero.current_tile_idx)
 
-        self.monsters = [
-            monster for monster in self.monsters if monster.life_points > 0
-        ]
+        self._update_fireball()
+
+        defeated_monster_idxs = self.monsters.defeated()
+        for monster_idx in defeated_monster_idxs:
+            monster = self.monsters[monster_idx]
+            self._remove_character_from_game_map(monster, GameObjectType.MONSTER)
+            self.ai_scheduler.unschedule(monster)
+        self.monsters.remove(defeated_monster_idxs)
         self.are_open_doors = len(self.monsters) == 0
-        for monster in self.monsters:
-            monster.update(time_delta_in_secs)
-            if (
-                monster.state == CharacterState.MOVE
-                and self.laser_countdown_in_secs < -0.0
-                and random.random() < 0.5
-            ):
-                self.__shoot_laser(monster)
-                self.laser_countdown_in_secs = 2.0 + random.uniform(-1.0, +1.0)
+        with profiler.room_phase("monsters.think"):
+            self.ai_scheduler.update(time_delta_in_secs)
+        with profiler.room_phase("monsters.update"):
+            # Only movement is updated every step, decisions are scheduled
+            for monster in self.monsters:
+                self._update_character(
+                    monster, GameObjectType.MONSTER, time_delta_in_secs
+                )
+        if self.laser_countdown_in_secs < -0.0:
+            self.__shoot_laser_from_any_monster()
 
-        self.lasers = [
-            laser
-            for laser in self.lasers
-            if is_valid_tile(tile_idx(laser.position))
-            and not self.__laser_collision_obstacle(laser)
-        ]
+        with profiler.room_phase("lasers.update"):
+            self._update_lasers()
+
+        self.laser_countdown_in_secs -= time_delta_in_secs
+
+    def _update_fireball(self) -> None:
+        if self.fireball:
+            if hit_monster := self.__fireball_collision__monster():
+                hit_monster.life_points -= 1
+                self._release_fireball()
+                audio.play_effect("fireball_hit")
 
-        for laser in self.lasers:
-            if laser.collision_box.colliderect(self.hero.collision_box):
+    def _update_lasers(self) -> None:
+        # Lasers hitting walls are gone before reaching the hero
+        destroyed_laser_idxs = set(
+            self.lasers.blocked(self.game.map, GameObjectType.OBSTACLE)
+        )
+        for laser_idx in self.lasers.colliding(self.hero.collision_box):
+            if laser_idx not in destroyed_laser_idxs:
                 self.game.hero_life_points -= 1
+                destroyed_laser_idxs.add(laser_idx)
+        self.lasers.remove(destroyed_laser_idxs)
 
-        self.lasers = [
-            laser
-            for laser in self.lasers
-            if not laser.collision_box.colliderect(self.hero.collision_box)
-        ]
+    def exit(self) -> None:
+        super().exit()
+        self.lasers.clear()
+        self.ai_scheduler.clear()
 
-        self.laser_countdown_in_secs -= time_delta_in_secs
+    def _on_chunk_generated(self, tiles: pygame.Rect) -> None:
+        super()._on_chunk_generated(tiles)
+        # Walls may have turned into floor, paths through them are not known yet
+        self.hero_flow_field.goal_tile_idx = None
 
     def _update_game_map(self) -> None:
         super()._update_game_map()
 
         for monster in self.monsters:
-            self.game.map[int(monster.current_tile_idx.y)][
-                int(monster.current_tile_idx.x)
-            ] = GameObjectType.MONSTER
+            self._add_character_to_game_map(monster, GameObjectType.MONSTER)
+
+        self.hero_flow_field.update(self.game, self.hero.current_tile_idx)
 
     def __fireball_collision__monster(self) -> Monster | None:
         if self.fireball:
-            for monster in self.monsters:
-                if monster.collision_box.colliderect(self.fireball.collision_box):
-                    return monster
+            for monster_idx in self.monsters.colliding(self.fireball.collision_box):
+                return self.monsters[monster_idx]
         return None
 
+    def __shoot_laser_from_any_monster(self) -> None:
+        for monster in self.monsters:
+            if monster.state == CharacterState.MOVE and self.random.random() < 0.5:
+                self.__shoot_laser(monster)
+                self.laser_countdown_in_secs = 2.0 + self.random.uniform(-1.0, +1.0)
+                return
+
     def __shoot_laser(self, monster: Monster):
         direction = pygame.Vector2(monster.next_tile_idx) - pygame.Vector2(
             monster.current_tile_idx
         )
         if direction.magnitude_squared() > 0.1:
-            laser = Laser()
-            laser.direction = direction
-            laser.position = monster.position + laser.direction * TILE_RADIUS
-            laser.angle = direction.angle_to(pygame.Vector2(0.0, -1.0))
-
-            self.lasers.append(laser)
-
-    def __laser_collision_obstacle(self, laser: Laser) -> bool:
-        laser_tile = tile_idx(laser.position)
-        return self.game.object_at(laser_tile) == GameObjectType.OBSTACLE
+            self.lasers.add(
+                monster.position + direction * TILE_RADIUS,
+                direction,
+                direction.angle_to(pygame.Vector2(0.0, -1.0)),
+            )
 
     def animate(self, time_delta_in_secs: float) -> None:
         super().animate(time_delta_in_secs)
-        for monster in self.monsters:
-            monster.animate(time_delta_in_secs)
-        for laser in self.lasers:
-            laser.animate(time_delta_in_secs)
+        with profiler.room_phase("monsters.animate"):
+            self.monsters.animate(time_delta_in_secs)
+        with profiler.room_phase("lasers.animate"):
+            self.lasers.animate(time_delta_in_secs)
 
-    def render(self) -> None:
-        super().render()
-        for monster in self.monsters:
-            monster.render()
-        for laser in self.lasers:
-            laser.render()
+    def _render_actors(self, interpolation: float) -> list[pygame.Rect]:
+        dirty_rects = super()._render_actors(interpolation)
+        # Only actors around the viewport, found without going through all of them
+        for monster in self.monsters.query(self.render_camera.rect):
+            dirty_rects.append(monster.render(self.render_camera, interpolation))
+        for laser in self.lasers.query(self.render_camera.rect):
+            dirty_rects.append(laser.render(self.render_camera, interpolation))
+        return dirty_rects
 
 
 class MenuRoom(Room):
@@ -471,7 +713,7 @@ class MenuRoom(Room):
             if event.type == pygame.MOUSEBUTTONDOWN:
                 self.game.state = GameState.START_PLAY
 
-    def render(self) -> None:
+    def render(self, interpolation: float = 1.0) -> None:
         screen = pygame.display.get_surface()
         screen.fill(MENU_COLOR)
         self.__render_centered_text("Random Dungeon", 200, self.game.title_font)
@@ -482,9 +724,9 @@ class MenuRoom(Room):
             self.__render_centered_text(
                 f"You achieved level {self.game.level}!", 300, self.game.menu_font
             )
+        render_queue.flush(screen)
 
     def __render_centered_text(self, text: str, y_pos: int, font: pygame.font.Font):
         text_surf = render_text(text, font, "azure1", MENU_COLOR)
-        text_rect = text_surf.get_rect(center=pygame.Vector2(WINDOW_WIDTH // 2, y_pos))
-        screen = pygame.display.get_surface()
-        screen.blit(text_surf, text_rect)
+        text_rect = text_surf.get_rect(center=(WINDOW_WIDTH // 2, y_pos))
+        render_queue.submit(text_surf, text_rect, RenderLayer.HUD)
@@ -0,0 +1,84 @@
+import heapq
+import typing
+
+
+class Agent(typing.Protocol):
+    def think(self) -> float | None: ...
+
+
+T = typing.TypeVar("T", bound=Agent)
+
+
+class AIScheduler(typing.Generic[T]):
+    # Timer queue of agent decisions. Only the decisions that are due are run, and no
+    # more than a budget of them per simulation step: when many agents are due at
+    # once, the others wait for the next steps instead of making a single step spike.
+    # The budget counts decisions rather than measuring time, so that runs stay
+    # deterministic and can be replayed.
+
+    def __init__(self, max_decisions_per_step: int) -> None:
+        self.max_decisions_per_step = max_decisions_per_step
+        self.time_in_secs = 0.0
+        # Entries are (due time, sequence number, agent), the sequence number keeps
+        # agents due at the same time in scheduling order
+        self.queue: list[tuple[float, int, T]] = []
+        # Latest sequence number of each scheduled agent, older entries are stale
+        self.agent_sequences: dict[T, int] = {}
+        self.num_scheduled = 0
+
+        self.num_decisions = 0
+        self.num_deferred = 0
+        self.max_delay_in_secs = 0.0
+
+    def __len__(self) -> int:
+        return len(self.agent_sequences)
+
+    def __contains__(self, agent: T) -> bool:
+        return agent in self.agent_sequences
+
+    def schedule(self, agent: T, delay_in_secs: float) -> None:
+        self.num_scheduled += 1
+        self.agent_sequences[agent] = self.num_scheduled
+        heapq.heappush(
+            self.queue, (self.time_in_secs + delay_in_secs, self.num_scheduled, agent)
+        )
+
+    def unschedule(self, agent: T) -> None:
+        # The queue entry is left behind and skipped once it comes out
+        self.agent_sequences.pop(agent, None)
+
+    def update(self, time_delta_in_secs: float) -> None:
+        self.time_in_secs += time_delta_in_secs
+
+        num_decisions = 0
+        while self.queue and self.queue[0][0] <= self.time_in_secs:
+            due_time_in_secs, sequence, agent = self.queue[0]
+            if self.agent_sequences.get(agent) != sequence:
+                heapq.heappop(self.queue)
+                continue
+            if num_decisions == self.max_decisions_per_step:
+                self.num_deferred += 1
+                break
+
+            heapq.heappop(self.queue)
+            del self.agent_sequences[agent]
+            self.max_delay_in_secs = max(
+                self.max_delay_in_secs, self.time_in_secs - due_time_in_secs
+            )
+
+            delay_in_secs = agent.think()
+            num_decisions += 1
+            if delay_in_secs is not None:
+                self.schedule(agent, delay_in_secs)
+
+        self.num_decisions += num_decisions
+
+    def clear(self) -> None:
+        self.queue.clear()
+        self.agent_sequences.clear()
+
+    def stats(self) -> str:
+        return (
+            f"{len(self)} agents, {self.num_decisions} decisions, "
+            f"{self.num_deferred} deferred, max delay {self.max_delay_in_secs:.3f} s"
+        )
@@ -0,0 +1,109 @@
+import array
+import math
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class SpatialHash:
+    # Uniform grid bucketing the slots of an entity store by the cell their center is
+    # in, rebuilt from the positions of the store after they changed. Queries only look
+    # at the cells overlapping the query bounds, so they cost as much as the entities
+    # around them, however many there are in the store. Positions are interleaved: x
+    # at 2 * i, y at 2 * i + 1.
+
+    def __init__(self, cell_size: tuple[int, int]) -> None:
+        self.cell_width, self.cell_height = cell_size
+        # Slots by cell, each in slot order so that queries are deterministic
+        self.cells: dict[tuple[int, int], list[int]] = {}
+        # The same buckets when rebuilt with numpy: slots sorted by the key of their
+        # cell, each row of cells being a contiguous range of keys
+        self.sorted_slots = None
+        self.sorted_keys = None
+
+    def cell_idx(self, x: float, y: float) -> tuple[int, int]:
+        return math.floor(x / self.cell_width), math.floor(y / self.cell_height)
+
+    def rebuild(self, positions: array.array, size: int, vectorized: bool) -> None:
+        if vectorized:
+            coords = numpy.frombuffer(positions, dtype=positions.typecode)[: 2 * size]
+            keys = self.__keys(
+                numpy.floor(coords[0::2] / self.cell_width).astype(numpy.int64),
+                numpy.floor(coords[1::2] / self.cell_height).astype(numpy.int64),
+            )
+            self.sorted_slots = numpy.argsort(keys, kind="stable")
+            self.sorted_keys = keys[self.sorted_slots]
+            self.cells = {}
+            return
+
+        self.sorted_slots = self.sorted_keys = None
+        cells: dict[tuple[int, int], list[int]] = {}
+        cell_width, cell_height = self.cell_width, self.cell_height
+        for slot in range(size):
+            cell_idx = (
+                math.floor(positions[2 * slot] / cell_width),
+                math.floor(positions[2 * slot + 1] / cell_height),
+            )
+            if cell := cells.get(cell_idx):
+                cell.append(slot)
+            else:
+                cells[cell_idx] = [slot]
+        self.cells = cells
+
+    def insert(self, slot: int, x: float, y: float) -> None:
+        # The slot must come after all others, as slots added to a store do
+        cell_i, cell_j = self.cell_idx(x, y)
+        if self.sorted_slots is not None:
+            key = self.__keys(cell_i, cell_j)
+            idx = numpy.searchsorted(self.sorted_keys, key, "right")
+            self.sorted_keys = numpy.insert(self.sorted_keys, idx, key)
+            self.sorted_slots = numpy.insert(self.sorted_slots, idx, slot)
+        elif cell := self.cells.get((cell_i, cell_j)):
+            cell.append(slot)
+        else:
+            self.cells[cell_i, cell_j] = [slot]
+
+    def query(self, left: float, top: float, right: float, bottom: float):
+        # Broad phase only, returns the slots with their center in a cell overlapping
+        # the bounds, in slot order. A numpy array of them when rebuilt with numpy.
+        first_i, first_j = self.cell_idx(left, top)
+        last_i, last_j = self.cell_idx(right, bottom)
+
+        if self.sorted_slots is not None:
+            rows = numpy.arange(first_j, last_j + 1, dtype=numpy.int64)
+            starts = numpy.searchsorted(
+                self.sorted_keys, self.__keys(first_i, rows), "left"
+            )
+            ends = numpy.searchsorted(
+                self.sorted_keys, self.__keys(last_i, rows), "right"
+            )
+            slots = [
+                self.sorted_slots[start:end]
+                for start, end in zip(starts.tolist(), ends.tolist())
+                if start < end
+            ]
+            if not slots:
+                return numpy.empty(0, dtype=numpy.intp)
+            return numpy.sort(numpy.concatenate(slots))
+
+        slots = []
+        num_cells = (last_i - first_i + 1) * (last_j - first_j + 1)
+        if num_cells <= len(self.cells):
+            for j in range(first_j, last_j + 1):
+                for i in range(first_i, last_i + 1):
+                    if cell := self.cells.get((i, j)):
+                        slots.extend(cell)
+        else:
+            # Bounds covering more cells than there are occupied, e.g. the viewport
+            for (i, j), cell in self.cells.items():
+                if first_i <= i <= last_i and first_j <= j <= last_j:
+                    slots.extend(cell)
+        slots.sort()
+        return slots
+
+    @staticmethod
+    def __keys(cell_is, cell_js):
+        # Rows of cells one after the other, each wide enough for any map
+        return (cell_js << 32) + cell_is
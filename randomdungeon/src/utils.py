@@ -1,3 +1,4 @@
+import collections
 import pygame
 
 from typing import Never, NoReturn
@@ -14,18 +15,20 @@ def window_size_in_tiles():
     return WINDOW_WIDTH // tile_width, WINDOW_HEIGHT // tile_height
 
 
-def is_valid_tile(tile_idx: pygame.Vector2 | tuple[int, int]) -> pygame.Vector2:
-    window_width_in_tiles, window_height_in_tiles = window_size_in_tiles()
-    return (
-        0 <= int(tile_idx[0]) < window_width_in_tiles
-        and 0 <= int(tile_idx[1]) < window_height_in_tiles
+def tile_idx(position: pygame.Vector2 | tuple[int, int]) -> pygame.Vector2:
+    return pygame.Vector2(
+        int(position[0] / (TILE_RADIUS * 2)), int(position[1] / (TILE_RADIUS * 2))
     )
 
 
-def tile_idx(position: pygame.Vector2 | tuple[int, int]) -> pygame.Vector2:
-    return pygame.Vector2(
+def tile_idx_ip(
+    position: pygame.Vector2 | tuple[int, int], tile_idx: pygame.Vector2
+) -> pygame.Vector2:
+    # Same as tile_idx, into an existing vector
+    tile_idx.update(
         int(position[0] / (TILE_RADIUS * 2)), int(position[1] / (TILE_RADIUS * 2))
     )
+    return tile_idx
 
 
 def are_same_tile(
@@ -41,10 +44,9 @@ def are_adjacent_tiles(
     tile_idx_1: pygame.Vector2 | tuple[int, int],
     tile_idx_2: pygame.Vector2 | tuple[int, int],
 ) -> bool:
-    dist_in_tiles = pygame.Vector2(tile_idx_1).distance_squared_to(
-        pygame.Vector2(tile_idx_2)
-    )
-    return dist_in_tiles < 1.5
+    delta_i = tile_idx_1[0] - tile_idx_2[0]
+    delta_j = tile_idx_1[1] - tile_idx_2[1]
+    return delta_i * delta_i + delta_j * delta_j < 1.5
 
 
 def tile_center(tile_idx: pygame.Vector2 | tuple[int, int]) -> pygame.Vector2:
@@ -61,20 +63,202 @@ def tile_top_left(tile_idx: pygame.Vector2 | tuple[int, int]) -> pygame.Vector2:
     )
 
 
-def load_tile(file_idx: str, alpha=True) -> pygame.Surface:
-    surf = pygame.image.load(GRAPHICS_TILES_PATH / f"tile_{file_idx}.png")
-    if alpha:
-        surf = surf.convert_alpha()
-    else:
-        surf = surf.convert()
-
-    surf = pygame.transform.scale(surf, tile_size())
-
-    return surf
+class TilePositions:
+    # Top left corners and centers of the tiles of a map in pixels, computed once per
+    # axis, so that hot loops look them up as integers instead of allocating vectors
+
+    def __init__(self, size_in_tiles: tuple[int, int]) -> None:
+        width, height = size_in_tiles
+        self.lefts = [i * TILE_RADIUS * 2 for i in range(width)]
+        self.tops = [j * TILE_RADIUS * 2 for j in range(height)]
+        self.center_xs = [left + TILE_RADIUS for left in self.lefts]
+        self.center_ys = [top + TILE_RADIUS for top in self.tops]
+
+    def top_left(self, tile_idx: pygame.Vector2 | tuple[int, int]) -> tuple[int, int]:
+        return self.lefts[int(tile_idx[0])], self.tops[int(tile_idx[1])]
+
+    def center(self, tile_idx: pygame.Vector2 | tuple[int, int]) -> tuple[int, int]:
+        return self.center_xs[int(tile_idx[0])], self.center_ys[int(tile_idx[1])]
+
+
+class RotatedSprite:
+    # All rotations of a sprite, precomputed once and quantized to the angle step
+
+    def __init__(
+        self, surface: pygame.Surface, scale: float, angle_step_in_degrees: float
+    ) -> None:
+        num_angles = max(1, round(360.0 / angle_step_in_degrees))
+        self.angle_step_in_degrees = 360.0 / num_angles
+        self.surfs = [
+            pygame.transform.rotozoom(
+                surface, angle_idx * self.angle_step_in_degrees, scale
+            )
+            for angle_idx in range(num_angles)
+        ]
+
+    def get(self, angle_in_degrees: float) -> pygame.Surface:
+        angle_idx = round(angle_in_degrees / self.angle_step_in_degrees)
+        return self.surfs[angle_idx % len(self.surfs)]
+
+
+class TileCache:
+    def __init__(self) -> None:
+        self.surfs: dict[tuple[str, bool, tuple[int, int]], pygame.Surface] = {}
+        self.rotated_sprites: dict[tuple[str, float, float], RotatedSprite] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, file_idx: str, alpha: bool, size: tuple[int, int]) -> pygame.Surface:
+        key = (file_idx, alpha, size)
+        if surf := self.surfs.get(key):
+            self.hits += 1
+            return surf
+
+        self.misses += 1
+        surf = pygame.image.load(GRAPHICS_TILES_PATH / f"tile_{file_idx}.png")
+        if alpha:
+            surf = surf.convert_alpha()
+        else:
+            surf = surf.convert()
+
+        surf = pygame.transform.scale(surf, size)
+
+        self.surfs[key] = surf
+        return surf
+
+    def get_rotated(
+        self, file_idx: str, scale: float, angle_step_in_degrees: float
+    ) -> RotatedSprite:
+        key = (file_idx, scale, angle_step_in_degrees)
+        if rotated_sprite := self.rotated_sprites.get(key):
+            self.hits += 1
+            return rotated_sprite
+
+        self.misses += 1
+        rotated_sprite = RotatedSprite(
+            self.get(file_idx, True, tile_size()), scale, angle_step_in_degrees
+        )
+        self.rotated_sprites[key] = rotated_sprite
+        return rotated_sprite
+
+    def preload(self, file_idxs: list[str], alpha=True) -> None:
+        for file_idx in file_idxs:
+            self.get(file_idx, alpha, tile_size())
+
+    def clear(self) -> None:
+        # Surfaces become invalid once the display is closed
+        self.surfs.clear()
+        self.rotated_sprites.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+tile_cache = TileCache()
+
+
+class TextCache:
+    # Rasterizing text is much slower than blitting it, and menus and debug overlays
+    # render the same strings frame after frame
+    def __init__(self, capacity: int = TEXT_CACHE_CAPACITY) -> None:
+        self.capacity = capacity
+        self.fonts: dict[tuple[str | None, int], pygame.font.Font] = {}
+        self.surfs: collections.OrderedDict[
+            tuple[str, pygame.font.Font, str, str | None], pygame.Surface
+        ] = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def font(self, size: int, name: str | None = None) -> pygame.font.Font:
+        key = (name, size)
+        if not (font := self.fonts.get(key)):
+            font = self.fonts[key] = pygame.font.Font(name, size)
+        return font
+
+    def get(
+        self,
+        text: str,
+        font: pygame.font.Font,
+        foreground: str,
+        background: str | None,
+    ) -> pygame.Surface:
+        key = (text, font, foreground, background)
+        if surf := self.surfs.get(key):
+            self.hits += 1
+            self.surfs.move_to_end(key)
+            return surf
+
+        self.misses += 1
+        text_surf = font.render(text, True, foreground)
+        text_rect = text_surf.get_rect()
+        surf = pygame.Surface(text_rect.size)
+
+        if background:
+            pygame.draw.rect(surf, background, text_rect)
+
+        surf.blit(text_surf, text_rect)
+
+        self.surfs[key] = surf
+        if len(self.surfs) > self.capacity:
+            self.surfs.popitem(last=False)
+            self.evictions += 1
+        return surf
+
+    def hit_rate(self) -> float:
+        num_lookups = self.hits + self.misses
+        return self.hits / num_lookups if num_lookups else 0.0
+
+    def stats(self) -> str:
+        return (
+            f"{len(self.surfs)}/{self.capacity} texts, "
+            f"{self.hit_rate():.0%} hits, {self.evictions} evictions"
+        )
+
+    def clear(self) -> None:
+        # Fonts become invalid once pygame quits
+        self.fonts.clear()
+        self.surfs.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+text_cache = TextCache()
+
+
+def store_previous_position(
+    previous_position: pygame.Vector2 | None, position: pygame.Vector2
+) -> pygame.Vector2:
+    # Reuses the vector of the previous simulation step when there is one
+    if previous_position is None:
+        return pygame.Vector2(position)
+    previous_position.update(position)
+    return previous_position
+
+
+def interpolate_position(
+    previous_position: pygame.Vector2 | None,
+    position: pygame.Vector2,
+    interpolation: float,
+) -> pygame.Vector2:
+    if previous_position is None or interpolation >= 1.0:
+        return position
+    return previous_position.lerp(position, interpolation)
+
+
+def load_tile(
+    file_idx: str, alpha=True, size: tuple[int, int] | None = None
+) -> pygame.Surface:
+    # Surfaces are shared among all callers, so they must not be modified in place
+    return tile_cache.get(file_idx, alpha, size or tile_size())
 
 
-def is_valid_position(position: pygame.Vector2 | tuple[int, int]) -> bool:
-    return 0 <= position[0] < WINDOW_WIDTH and 0 <= position[1] < WINDOW_HEIGHT
+def load_rotated_tile(
+    file_idx: str,
+    scale: float = 1.0,
+    angle_step_in_degrees: float = ROTATION_CACHE_ANGLE_STEP_IN_DEGREES,
+) -> RotatedSprite:
+    return tile_cache.get_rotated(file_idx, scale, angle_step_in_degrees)
 
 
 def render_text(
@@ -83,19 +267,10 @@ def render_text(
     foreground: str = "white",
     background: str | None = None,
 ) -> pygame.Surface:
-    if not font:
-        font = pygame.font.Font(None, 30)
-
-    text_surf = font.render(text, True, foreground)
-    text_rect = text_surf.get_rect()
-    render_surf = pygame.Surface(text_rect.size)
-
-    if background:
-        pygame.draw.rect(render_surf, background, text_rect)
-
-    render_surf.blit(text_surf, text_rect)
-
-    return render_surf
+    # Surfaces are shared among all callers, so they must not be modified in place
+    return text_cache.get(
+        text, font or text_cache.font(TEXT_DEFAULT_FONT_SIZE), foreground, background
+    )
 
 
 def debug(text: str, position=pygame.Vector2(10, 10)) -> None:
@@ -0,0 +1,135 @@
+import pygame
+import random
+import typing
+
+from grids import *
+
+# West, east, north and south
+AXIS_DIRECTIONS = ((-1, 0), (+1, 0), (0, -1), (0, +1))
+
+
+class TileIndex:
+    # Set of tiles with constant time random picks and removals. Tiles are kept in a
+    # list, along with the position of each of them to swap it with the last one when
+    # it is removed.
+
+    def __init__(self, tiles: typing.Iterable[tuple[int, int]] = ()) -> None:
+        self.tiles: list[tuple[int, int]] = []
+        self.positions: dict[tuple[int, int], int] = {}
+        for tile in tiles:
+            self.add(tile)
+
+    def __len__(self) -> int:
+        return len(self.tiles)
+
+    def __contains__(self, tile: tuple[int, int]) -> bool:
+        return tile in self.positions
+
+    def add(self, tile: tuple[int, int]) -> None:
+        if tile not in self.positions:
+            self.positions[tile] = len(self.tiles)
+            self.tiles.append(tile)
+
+    def discard(self, tile: tuple[int, int]) -> None:
+        position = self.positions.pop(tile, None)
+        if position is None:
+            return
+
+        last_tile = self.tiles.pop()
+        if last_tile != tile:
+            self.tiles[position] = last_tile
+            self.positions[last_tile] = position
+
+    def random_tile(self, rng: random.Random) -> tuple[int, int] | None:
+        return self.tiles[rng.randrange(len(self.tiles))] if self.tiles else None
+
+    def pop_random_tile(self, rng: random.Random) -> tuple[int, int] | None:
+        tile = self.random_tile(rng)
+        if tile is not None:
+            self.discard(tile)
+        return tile
+
+
+class AxisReach(typing.Generic[T]):
+    # Number of walkable tiles in a straight line from each tile of a grid, in each
+    # direction and up to a maximum distance. A random tile within reach is then
+    # picked in constant time, whatever the size of the map. Tables are rebuilt
+    # lazily, once per batch of terrain changes, and all at once with big integers
+    # holding one byte per tile.
+
+    def __init__(
+        self, grid: TileGrid[T], max_distance: int, walkable_values: tuple[T, ...]
+    ) -> None:
+        self.grid = grid
+        self.width, self.height = grid.width, grid.height
+        self.max_distance = min(max_distance, 255)
+        self.walkable_values = walkable_values
+        # One byte per tile and per direction, in the order of AXIS_DIRECTIONS
+        self.reaches = [bytearray(self.width * self.height) for _ in AXIS_DIRECTIONS]
+        self.is_dirty = True
+
+    def invalidate(self) -> None:
+        self.is_dirty = True
+
+    def __rebuild(self) -> None:
+        # Rows are padded with a tile that is never walkable, so that shifting the
+        # whole grid by a few tiles does not wrap runs around to the next row
+        width, height = self.width, self.height
+        stride = width + 1
+        mask = self.grid.mask(*self.walkable_values)
+        walkable = int.from_bytes(
+            b"".join(mask[j * width : (j + 1) * width] + b"\0" for j in range(height)),
+            "little",
+        )
+        num_bytes = stride * height
+        all_bytes = (1 << (8 * num_bytes)) - 1
+
+        # Counting the tiles at distance 1, 2... for which all tiles up to them are
+        # walkable. Counts never exceed 255, so bytes never carry into each other.
+        for direction_idx, tile_offset in enumerate((-1, +1, -stride, +stride)):
+            reach = 0
+            run = all_bytes
+            for distance in range(1, self.max_distance + 1):
+                bit_offset = 8 * tile_offset * distance
+                shifted = (
+                    walkable >> bit_offset
+                    if bit_offset > 0
+                    else (walkable << -bit_offset) & all_bytes
+                )
+                run &= shifted
+                if not run:
+                    break
+                reach += run
+
+            padded_reach = reach.to_bytes(num_bytes, "little")
+            self.reaches[direction_idx][:] = b"".join(
+                padded_reach[j * stride : j * stride + width] for j in range(height)
+            )
+        self.is_dirty = False
+
+    def reach(self, tile_idx: tuple[int, int]) -> tuple[int, int, int, int]:
+        if self.is_dirty:
+            self.__rebuild()
+        idx = tile_idx[1] * self.width + tile_idx[0]
+        west, east, north, south = self.reaches
+        return west[idx], east[idx], north[idx], south[idx]
+
+    def random_target(
+        self, tile_idx: tuple[int, int], rng: random.Random
+    ) -> tuple[int, int] | None:
+        # All tiles within reach are equally likely
+        reaches = self.reach(tile_idx)
+        num_targets = sum(reaches)
+        if not num_targets:
+            return None
+
+        target_idx = rng.randrange(num_targets)
+        for (direction_i, direction_j), reach in zip(AXIS_DIRECTIONS, reaches):
+            if target_idx < reach:
+                distance = target_idx + 1
+                return (
+                    tile_idx[0] + direction_i * distance,
+                    tile_idx[1] + direction_j * distance,
+                )
+            target_idx -= reach
+        return None